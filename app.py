@@ -1,13 +1,17 @@
 import streamlit as st
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Ensure we can import from utils and src
 sys.path.append(os.path.join(os.path.dirname(__file__)))
 
-from utils.emoji_searcher import EmojiSearcher
+from utils import metrics
+from utils.searcher_router import SearcherRouter, parse_routes
+from utils.split_table import SplitTableStore
 from utils.subword_tokenizer import SubwordTokenizer
-from src.components import render_emoji_grid
+from utils.warm_up import readiness, start_warm_up
+from src.components import render_emoji_grid, render_emoji_page
 
 # Page Configuration
 st.set_page_config(
@@ -33,11 +37,32 @@ st.markdown("""
 st.title("✨ Semantic Emoji Search")
 st.markdown("Type a phrase (support 25+ languages following WordNet (OMW 1.4)) to find the most relevant emojis powered by AI.")
 
-# Initialize Searcher (Cached)
+# Initialize Searchers (Cached)
 @st.cache_resource
-def get_searcher():
+def get_router(_tokenizer):
     try:
-        return EmojiSearcher()
+        collection = os.environ.get("EMOJI_COLLECTION", "minilm")
+        # "numpy" answers from an exact in-memory index instead of ChromaDB's HNSW index.
+        # With EMOJI_INDEX_PATH (memory-mapped index) and EMOJI_EMBEDDING_SOCKET (shared
+        # embedding server) every worker on a host shares one index and one model.
+        # The default collection is loaded by the warm-up thread, not here; routed
+        # collections load on their first query.
+        return SearcherRouter(
+            collection,
+            # e.g. EMOJI_ROUTES="tha=e5" sends queries detected as Thai to the e5 collection
+            routes=parse_routes(os.environ.get("EMOJI_ROUTES")),
+            detect_language=_tokenizer.detect_language if _tokenizer else None,
+            memory_budget_mb=float(os.environ.get("EMOJI_MEMORY_BUDGET_MB", 0)) or None,
+            collection_kwargs={collection: {"index_path": os.environ.get("EMOJI_INDEX_PATH")}},
+            backend=os.environ.get("EMOJI_SEARCH_BACKEND", "chroma"),
+            embedding_socket=os.environ.get("EMOJI_EMBEDDING_SOCKET"),
+            # "onnx" encodes queries with onnxruntime instead of torch
+            embedding_backend=os.environ.get("EMOJI_EMBEDDING_BACKEND", "torch"),
+            onnx_quantized=os.environ.get("EMOJI_ONNX_QUANTIZED") == "1",
+            onnx_threads=int(os.environ.get("EMOJI_ONNX_THREADS", 0)) or None,
+            # "hybrid" / "lexical_first" answer exact tag matches from a BM25 index
+            retrieval=os.environ.get("EMOJI_RETRIEVAL", "semantic")
+        )
     except Exception as e:
         return None
 
@@ -49,77 +74,206 @@ def get_tokenizer():
         st.error(f"Failed to load tokenizer: {e}")
         return None
 
-searcher = get_searcher()
+@st.cache_resource
+def get_executor():
+    # Shared by all sessions; searches and splits only release the GIL in native code,
+    # so a few workers are enough
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="emoji-search")
+
+@st.cache_resource
+def get_split_table(_searcher, _tokenizer):
+    # Precomputed splits and results for compound_vocabulary.txt, rebuilt in the
+    # background whenever the collection or the lexicon changes
+    return SplitTableStore(_searcher, _tokenizer)
+
+@st.cache_resource
+def get_metrics_server():
+    # Prometheus exporter for the per-stage histograms, when a port is configured
+    port = os.environ.get("EMOJI_METRICS_PORT")
+    # Localhost only by default; EMOJI_METRICS_HOST=0.0.0.0 for a scraper on another host
+    host = os.environ.get("EMOJI_METRICS_HOST", "127.0.0.1")
+    return metrics.start_metrics_server(int(port), host=host) if port else None
+
+@st.cache_resource
+def get_warm_up(_searcher, _tokenizer):
+    # Loads the model, index and lexicon once per process while the page is already usable
+    return start_warm_up(_searcher, _tokenizer)
+
 tokenizer = get_tokenizer()
+router = get_router(tokenizer)
+# Typeahead, split table and warm-up use the default collection
+searcher = router.default if router else None
+get_metrics_server()
 
-if not searcher:
+if not searcher or searcher.load_error:
     st.error("Failed to initialize the search engine. Please check if the ChromaDB is correctly set up.")
     st.stop()
 
+get_warm_up(searcher, tokenizer)
+if not readiness(searcher, tokenizer)["ready"]:
+    st.caption("⏳ Loading the search model in the background, the first search may take a moment.")
+
 # Search Interface
 query = st.text_input("Search", placeholder="Search for something...", key="search_input", label_visibility="collapsed")
 
-if query:
-    n_results = 6
-    with st.spinner("Finding the best emojis..."):
-        results = searcher.search(query, n_results=n_results)
+def use_suggestion():
+    """Copy the picked suggestion into the search box (callbacks run before the rerun)."""
+    if st.session_state.suggestion:
+        st.session_state.search_input = st.session_state.suggestion
+    st.session_state.suggestion = None
+
+# Prefix suggestions from emoji names, tags and popular queries; no embedding involved
+typeahead = searcher.typeahead() if query else None
+if typeahead:
+    if st.session_state.get("last_query") != query:
+        typeahead.record_query(query)
+        st.session_state.last_query = query
+
+    suggestions = {s["text"]: s for s in typeahead.suggest(query) if s["text"] != query.strip().lower()}
+    if suggestions:
+        st.pills(
+            "Suggestions",
+            list(suggestions),
+            format_func=lambda text: f"{''.join(suggestions[text]['characters'][:3])} {text}".strip(),
+            key="suggestion",
+            on_change=use_suggestion,
+            label_visibility="collapsed"
+        )
+
+def search_split(parts):
+    """Search every part of one split in a single batched call (runs on the thread pool)."""
+    part_results = router.search_many(parts, n_results=1)
+    # parts is list of strings, e.g. ['Sun', 'flower']
+    return [(part, part_results.get(part, [])) for part in parts]
+
+def render_split(idx, split_group):
+    """Render one compound breakdown option."""
+    # split_group is a list of (word, results)
+    words = [item[0] for item in split_group]
+    breakdown_text = " + ".join([f"**{w}**" for w in words])
+    
+    st.markdown(f"##### Option {idx+1}: {breakdown_text}")
+    
+    # Display parts in a grid with 2 columns per row
+    grid_cols = 2
+    for i in range(0, len(split_group), grid_cols):
+        chunk = split_group[i:i + grid_cols]
+        cols = st.columns(grid_cols)
         
-        if tokenizer:
-            try:
-                subword_splits = tokenizer.split_compound(query)
-                # subword_splits is list of list of str
-                print("Subword splits:", subword_splits)
-                
-                # Prepare results for all splits
-                all_compound_results = []
-                for parts in subword_splits:
-                    # parts is list of strings, e.g. ['Sun', 'flower']
-                    split_entry = []
-                    for part in parts:
-                        part_res = searcher.search(part, n_results=1)
-                        split_entry.append((part, part_res))
-                    all_compound_results.append(split_entry)
-
-            except Exception as e:
-                print(f"Subword search error: {e}")
-                all_compound_results = []
+        for j, (word, sub_res) in enumerate(chunk):
+            with cols[j]:
+                st.caption(f"'{word}'")
+                if sub_res:
+                    # Use more columns inside to make it more square if width allows
+                    render_emoji_grid(sub_res, columns=2)
+                else:
+                    st.text("-")
+
+def collect_splits(executor, split_future):
+    """Wait for the compound split and the part searches of every option."""
+    if not split_future:
+        return []
+    try:
+        subword_splits = split_future.result()
+    except Exception as e:
+        print(f"Subword split error: {e}")
+        return []
+    futures = [metrics.submit(executor, search_split, parts) for parts in subword_splits]
+    splits = []
+    for future in futures:
+        try:
+            splits.append(future.result())
+        except Exception as e:
+            print(f"Subword search error: {e}")
+    return splits
+
+split_table = get_split_table(searcher, tokenizer) if tokenizer else None
+
+# Render the main grid and every compound breakdown as one component (one copy of
+# the stylesheet and script) once everything is ready, instead of streaming each
+# grid in as its search finishes. Table hits are always rendered this way.
+combined_render = os.environ.get("EMOJI_COMBINED_RENDER") == "1"
+
+show_timings = st.sidebar.toggle("Show timing breakdown", value=os.environ.get("EMOJI_DEBUG_PANEL") == "1")
+
+if query:
+    with metrics.trace() as query_trace:
+        n_results = 6
+        executor = get_executor()
+
+        # High-frequency words are answered entirely from the precomputed table
+        # (built with the default collection, so not for queries routed elsewhere)
+        routed_to_default = router.route(query) == router.default_collection
+        precomputed = split_table.lookup(query) if split_table and routed_to_default else None
+
+        if precomputed:
+            results, precomputed_splits = precomputed
+            split_future = None
         else:
-            all_compound_results = []
+            # Start the main search and the compound split together; the main grid is
+            # rendered as soon as its search finishes, independent of the breakdown work.
+            main_future = metrics.submit(executor, router.search, query, n_results=n_results)
+            split_future = None
+            if tokenizer:
+                # Only the few splits with the fewest parts are worth showing
+                split_future = metrics.submit(executor, tokenizer.split_compound, query, max_splits=5, rank="fewest_parts")
 
-    if results:
-        st.markdown(f"### Results for *'{query}'*")
-        
-        # Display the results using the interactive component
-        render_emoji_grid(results)
-    else:
-        st.info("No direct matching emojis found.")
-
-    # Display Subword Analysis if available
-    if all_compound_results:
-        st.markdown("---")
-        st.subheader("Compound Breakdowns")
+            with st.spinner("Finding the best emojis..."):
+                results = main_future.result()
+
+        if precomputed or combined_render:
+            if precomputed:
+                splits = precomputed_splits
+            else:
+                with st.spinner("Analyzing compound words..."):
+                    splits = collect_splits(executor, split_future)
+            if not results:
+                st.info("No direct matching emojis found.")
+            if results or splits:
+                render_emoji_page(query, results, splits)
+        else:
+            if results:
+                st.markdown(f"### Results for *'{query}'*")
         
-        for idx, split_group in enumerate(all_compound_results):
-            # split_group is a list of (word, results)
-            words = [item[0] for item in split_group]
-            breakdown_text = " + ".join([f"**{w}**" for w in words])
-            
-            st.markdown(f"##### Option {idx+1}: {breakdown_text}")
-            
-            # Display parts in a grid with 2 columns per row
-            grid_cols = 2
-            for i in range(0, len(split_group), grid_cols):
-                chunk = split_group[i:i + grid_cols]
-                cols = st.columns(grid_cols)
-                
-                for j, (word, sub_res) in enumerate(chunk):
-                    with cols[j]:
-                        st.caption(f"'{word}'")
-                        if sub_res:
-                            # Use more columns inside to make it more square if width allows
-                            render_emoji_grid(sub_res, columns=2)
-                        else:
+                # Display the results using the interactive component
+                render_emoji_grid(results)
+            else:
+                st.info("No direct matching emojis found.")
+
+            # Display Subword Analysis if available
+            subword_splits = []
+            if split_future:
+                try:
+                    with st.spinner("Analyzing compound words..."):
+                        subword_splits = split_future.result()
+                    # subword_splits is list of list of str
+                    print("Subword splits:", subword_splits)
+                except Exception as e:
+                    print(f"Subword split error: {e}")
+
+            if subword_splits:
+                st.markdown("---")
+                st.subheader("Compound Breakdowns")
+
+                # One slot per option, filled in as each option's part searches complete
+                slots = [st.container() for _ in subword_splits]
+                split_futures = {
+                    metrics.submit(executor, search_split, parts): idx
+                    for idx, parts in enumerate(subword_splits)
+                }
+
+                for future in as_completed(split_futures):
+                    idx = split_futures[future]
+                    with slots[idx]:
+                        try:
+                            render_split(idx, future.result())
+                        except Exception as e:
+                            print(f"Subword search error: {e}")
                             st.text("-")
-            
-            if idx < len(all_compound_results) - 1:
-                st.divider()
\ No newline at end of file
+                        if idx < len(subword_splits) - 1:
+                            st.divider()
+
+    if show_timings:
+        with st.expander("Timing breakdown", expanded=True):
+            # Nested stages (e.g. embed inside search_many) overlap, so totals do not add up
+            st.dataframe(query_trace.breakdown(), hide_index=True)
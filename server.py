@@ -0,0 +1,289 @@
+import argparse
+import asyncio
+import functools
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+# Ensure we can import from utils
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from utils.emoji_searcher import EmojiSearcher
+from utils.lru_cache import LRUCache
+from utils.metrics import REGISTRY
+from utils.micro_batcher import MicroBatcher
+from utils.searcher_router import SearcherRouter, parse_routes
+from utils.subword_tokenizer import SubwordTokenizer
+from utils.warm_up import readiness, start_warm_up
+
+MAX_RESULTS = 50
+# How long /suggest?search=1 waits for further keystrokes before searching
+DEBOUNCE_MS = 250
+
+SEARCHER = web.AppKey("searcher", EmojiSearcher)
+ROUTER = web.AppKey("router", SearcherRouter)
+TOKENIZER = web.AppKey("tokenizer", SubwordTokenizer)
+EXECUTOR = web.AppKey("executor", ThreadPoolExecutor)
+BATCHER = web.AppKey("batcher", MicroBatcher)
+# Batchers of requests naming their collection, created on first use
+COLLECTION_BATCHERS = web.AppKey("collection_batchers", dict)
+SESSIONS = web.AppKey("typeahead_sessions", LRUCache)
+
+
+def _int_param(request, name, default, maximum=None):
+    """Read an integer query parameter, raising 400 on invalid input."""
+    try:
+        value = int(request.query.get(name, default))
+    except ValueError:
+        raise web.HTTPBadRequest(reason=f"'{name}' must be an integer")
+    if value < 1:
+        raise web.HTTPBadRequest(reason=f"'{name}' must be positive")
+    return min(value, maximum) if maximum else value
+
+
+def _query_param(request):
+    query = request.query.get("q", "").strip()
+    if not query:
+        raise web.HTTPBadRequest(reason="Missing query parameter 'q'")
+    return query
+
+
+def _results_json(results) -> list[dict]:
+    """Plain dicts of a search result (the searcher returns read-only views)."""
+    return [hit.to_dict() for hit in results]
+
+
+def _batcher(request) -> MicroBatcher:
+    """
+    Batcher for the request: the routed one (by detected language), or with
+    ?collection=<name or alias> one that sends every query to that collection.
+    """
+    collection = request.query.get("collection")
+    if not collection:
+        return request.app[BATCHER]
+    router = request.app[ROUTER]
+    try:
+        searcher = router.searcher(collection)
+    except ValueError as e:
+        raise web.HTTPBadRequest(reason=str(e))
+
+    batchers = request.app[COLLECTION_BATCHERS]
+    name = searcher.collection_name
+    if name not in batchers:
+        main = request.app[BATCHER]
+        batchers[name] = MicroBatcher(
+            functools.partial(router.search_many, collection=name),
+            max_batch_size=main.max_batch_size,
+            max_wait_ms=main.max_wait * 1000,
+            executor=main.executor
+        )
+    return batchers[name]
+
+
+async def _typeahead(request):
+    """
+    The default searcher's typeahead, fetched in the executor: picking up a rebuilt
+    collection or building the prefix index must not block the event loop.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        request.app[EXECUTOR], request.app[SEARCHER].typeahead
+    )
+
+
+async def handle_search(request):
+    """GET /search?q=<text>&n=<results>[&collection=<name>]"""
+    query = _query_param(request)
+    n_results = _int_param(request, "n", 6, MAX_RESULTS)
+    results = await _batcher(request).search(query, n_results)
+    # The query may have been routed to another collection, so the default searcher can
+    # still be warming up; its popular queries only count once it is ready
+    if request.app[SEARCHER].ready.is_set():
+        typeahead = await _typeahead(request)
+        if typeahead is not None:
+            typeahead.record_query(query)
+    return web.json_response({"query": query, "results": _results_json(results)})
+
+
+async def handle_suggest(request):
+    """
+    GET /suggest?q=<partial text>&session=<id>&n=<suggestions>[&search=1&results=<n>]
+
+    Called on every keystroke. Suggestions come from the prefix index only. With a
+    session id, each keystroke narrows the previous one's candidates. With search=1 the
+    semantic search runs after DEBOUNCE_MS, unless a newer keystroke of the same
+    session arrived in the meantime ("superseded").
+    """
+    text = request.query.get("q", "")
+    n_suggestions = _int_param(request, "n", 8, MAX_RESULTS)
+    if not request.app[SEARCHER].ready.is_set():
+        raise web.HTTPServiceUnavailable(reason="Warming up")
+    typeahead = await _typeahead(request)
+    if typeahead is None:
+        raise web.HTTPServiceUnavailable(reason="Collection not loaded")
+
+    session_id = request.query.get("session")
+    session = request.app[SESSIONS].get(session_id) if session_id else None
+    if session is None:
+        session = typeahead.session()
+        if session_id:
+            request.app[SESSIONS].put(session_id, session)
+    elif session.typeahead is not typeahead:
+        # The collection was rebuilt, start over on the new index
+        session = typeahead.session()
+        request.app[SESSIONS].put(session_id, session)
+
+    response = {"query": text, "suggestions": session.update(text, n_suggestions)}
+
+    query = text.strip()
+    if request.query.get("search") == "1" and query:
+        n_results = _int_param(request, "results", 6, MAX_RESULTS)
+        await asyncio.sleep(DEBOUNCE_MS / 1000)
+        if session.text != text:
+            response["superseded"] = True
+        else:
+            response["results"] = _results_json(await _batcher(request).search(query, n_results))
+            typeahead.record_query(query)
+    return web.json_response(response)
+
+
+async def handle_compound(request):
+    """GET /compound?q=<text>&max_splits=<splits>&n=<results per part>[&collection=<name>]"""
+    query = _query_param(request)
+    max_splits = _int_param(request, "max_splits", 5, MAX_RESULTS)
+    n_results = _int_param(request, "n", 1, MAX_RESULTS)
+
+    loop = asyncio.get_running_loop()
+    splits = await loop.run_in_executor(
+        request.app[EXECUTOR],
+        lambda: request.app[TOKENIZER].split_compound(query, max_splits=max_splits, rank="fewest_parts")
+    )
+
+    # Every part of every split goes through the batcher concurrently
+    parts = list(dict.fromkeys(part for split in splits for part in split))
+    batcher = _batcher(request)
+    part_results = await asyncio.gather(*(batcher.search(part, n_results) for part in parts))
+    results_by_part = dict(zip(parts, part_results))
+
+    return web.json_response({
+        "query": query,
+        "splits": [
+            [{"text": part, "results": _results_json(results_by_part[part])} for part in split]
+            for split in splits
+        ]
+    })
+
+
+async def handle_metrics(request):
+    """GET /metrics (Prometheus text format)"""
+    return web.Response(text=REGISTRY.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+
+async def handle_health(request):
+    """GET /health (503 until the warm-up has finished)"""
+    status = readiness(request.app[SEARCHER], request.app[TOKENIZER])
+    return web.json_response(
+        {"status": "ok" if status["ready"] else "warming_up", **status,
+         "batching": request.app[BATCHER].stats(), "routing": request.app[ROUTER].stats()},
+        status=200 if status["ready"] else 503
+    )
+
+
+def create_app(router, tokenizer, max_batch_size=64, max_wait_ms=5.0, workers=4):
+    """
+    Build the aiohttp application serving the collections of `router` and `tokenizer`.
+    Typeahead, health and warm-up use the router's default searcher.
+    """
+    searcher = router.default
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="emoji-server")
+    app = web.Application()
+    app[SEARCHER] = searcher
+    app[ROUTER] = router
+    app[TOKENIZER] = tokenizer
+    app[EXECUTOR] = executor
+    app[SESSIONS] = LRUCache(max_size=10000, ttl=600)
+    app[COLLECTION_BATCHERS] = {}
+    app[BATCHER] = MicroBatcher(
+        router.search_many,
+        max_batch_size=max_batch_size,
+        max_wait_ms=max_wait_ms,
+        executor=executor
+    )
+
+    async def on_startup(app):
+        # Load the model, index, prefix index and lexicon without delaying startup
+        start_warm_up(searcher, tokenizer)
+
+    async def on_cleanup(app):
+        await app[BATCHER].close()
+        for batcher in app[COLLECTION_BATCHERS].values():
+            await batcher.close()
+        app[EXECUTOR].shutdown(wait=False)
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_get("/search", handle_search)
+    app.router.add_get("/compound", handle_compound)
+    app.router.add_get("/suggest", handle_suggest)
+    app.router.add_get("/health", handle_health)
+    app.router.add_get("/metrics", handle_metrics)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Emoji search HTTP service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--collection", default=os.environ.get("EMOJI_COLLECTION", "minilm"),
+                        help="Default collection (name or alias: minilm, e5).")
+    parser.add_argument("--routes", default=os.environ.get("EMOJI_ROUTES"),
+                        help="Per-language collections, e.g. 'tha=e5,jpn=e5' (ISO 639-3 codes).")
+    parser.add_argument("--memory-budget-mb", type=float,
+                        default=float(os.environ.get("EMOJI_MEMORY_BUDGET_MB", 0)) or None,
+                        help="Unload idle collections to keep the estimated model and index memory below this.")
+    parser.add_argument("--idle-ttl", type=float, default=None,
+                        help="Unload non-default collections unused for this many seconds.")
+    parser.add_argument("--backend", choices=["chroma", "numpy"],
+                        default=os.environ.get("EMOJI_SEARCH_BACKEND", "chroma"))
+    parser.add_argument("--index-path", default=os.environ.get("EMOJI_INDEX_PATH"),
+                        help="Memory-mapped index directory of the default collection for the numpy backend.")
+    parser.add_argument("--embedding-socket", default=os.environ.get("EMOJI_EMBEDDING_SOCKET"),
+                        help="Unix socket of a shared embedding server (python -m utils.embedding_service).")
+    parser.add_argument("--embedding-backend", choices=["torch", "onnx"],
+                        default=os.environ.get("EMOJI_EMBEDDING_BACKEND", "torch"),
+                        help="Encode queries with torch or with the ONNX export.")
+    parser.add_argument("--onnx-quantized", action="store_true", help="Use the int8 ONNX model.")
+    parser.add_argument("--onnx-threads", type=int, default=None, help="onnxruntime intra-op threads.")
+    parser.add_argument("--retrieval", choices=["semantic", "hybrid", "lexical_first"],
+                        default=os.environ.get("EMOJI_RETRIEVAL", "semantic"),
+                        help="Add BM25 matching over tags and short descriptions to the vector search.")
+    parser.add_argument("--batch-size", type=int, default=64, help="Maximum queries per embedding batch.")
+    parser.add_argument("--batch-wait-ms", type=float, default=5.0,
+                        help="How long a request waits for others to join its batch.")
+    parser.add_argument("--workers", type=int, default=4, help="Threads for searches and splitting.")
+    args = parser.parse_args()
+
+    tokenizer = SubwordTokenizer()
+    router = SearcherRouter(
+        args.collection,
+        routes=parse_routes(args.routes),
+        detect_language=tokenizer.detect_language,
+        memory_budget_mb=args.memory_budget_mb,
+        idle_ttl=args.idle_ttl,
+        collection_kwargs={args.collection: {"index_path": args.index_path}},
+        backend=args.backend,
+        embedding_socket=args.embedding_socket,
+        embedding_backend=args.embedding_backend,
+        onnx_quantized=args.onnx_quantized,
+        onnx_threads=args.onnx_threads,
+        retrieval=args.retrieval
+    )
+    app = create_app(
+        router,
+        tokenizer,
+        max_batch_size=args.batch_size,
+        max_wait_ms=args.batch_wait_ms,
+        workers=args.workers
+    )
+    web.run_app(app, host=args.host, port=args.port)
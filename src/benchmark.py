@@ -0,0 +1,276 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Ensure we can import from utils
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.subword_tokenizer import MULTILINGUAL_QUERIES
+
+# Fixed corpus, so runs on different backends / commits are comparable: the shared
+# multilingual queries, plus the Thai compounds of utils.subword_tokenizer.THAI_COMPOUND_EXAMPLES
+# and these English ones.
+ENGLISH_COMPOUNDS = ["Sunflower", "Firefly", "Keyboard", "Rainbow", "Snowman", "Toothbrush", "Butterfly", "Football"]
+
+# Regression threshold for --compare: fail if a latency grows by more than this factor
+REGRESSION_FACTOR = 1.25
+
+
+def percentiles(samples_ms: list[float]) -> dict:
+    """p50 / p95 / p99, mean and max of latency samples in milliseconds."""
+    if not samples_ms:
+        return {}
+    ordered = sorted(samples_ms)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": ordered[-1],
+    }
+
+
+def measure(fn, inputs: list, repeat: int = 3) -> dict:
+    """Call `fn` on every input `repeat` times, returning latency percentiles and throughput."""
+    samples = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in inputs:
+            t0 = time.perf_counter()
+            fn(item)
+            samples.append(1000 * (time.perf_counter() - t0))
+    elapsed = time.perf_counter() - start
+    return {**percentiles(samples), "throughput_qps": len(samples) / elapsed if elapsed else 0.0}
+
+
+def measure_concurrent(fn, inputs: list, concurrency: int, repeat: int = 3) -> dict:
+    """Throughput of `fn` with `concurrency` threads, as a server would call it."""
+    work = [item for _ in range(repeat) for item in inputs]
+    samples = []
+
+    def timed(item):
+        t0 = time.perf_counter()
+        fn(item)
+        return 1000 * (time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = list(executor.map(timed, work))
+    elapsed = time.perf_counter() - start
+    return {**percentiles(samples), "concurrency": concurrency,
+            "throughput_qps": len(samples) / elapsed if elapsed else 0.0}
+
+
+def count_calls(obj, name: str):
+    """Wrap `obj.name` with a call counter; returns the counter dict."""
+    counter = {"calls": 0}
+    original = getattr(obj, name)
+
+    def wrapper(*args, **kwargs):
+        counter["calls"] += 1
+        return original(*args, **kwargs)
+
+    setattr(obj, name, wrapper)
+    return counter
+
+
+def app_query_path(searcher, tokenizer, executor, query: str, split_table=None, n_results=6) -> dict:
+    """
+    The work app.py does for one submitted query, without rendering: split table
+    lookup, then the main search and compound split in parallel, then one batched
+    search per split option.
+    """
+    precomputed = split_table.lookup(query) if split_table else None
+    if precomputed:
+        results, splits = precomputed
+        return {"results": results, "splits": splits}
+
+    main_future = executor.submit(searcher.search, query, n_results=n_results)
+    split_future = executor.submit(tokenizer.split_compound, query, max_splits=5, rank="fewest_parts")
+    results = main_future.result()
+
+    split_futures = {
+        executor.submit(searcher.search_many, parts, n_results=1): parts
+        for parts in split_future.result()
+    }
+    splits = []
+    for future in as_completed(split_futures):
+        part_results = future.result()
+        splits.append([(part, part_results.get(part, [])) for part in split_futures[future]])
+    return {"results": results, "splits": splits}
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmarks(backend="chroma", index_path=None, embedding_backend="torch", retrieval="semantic",
+                   repeat=3, concurrency=4, use_split_table=False) -> dict:
+    """
+    Run every benchmark and return the report.
+
+    Search latency is measured with the result and embedding caches disabled (every
+    query embeds and searches) and enabled (steady state after the first pass).
+    """
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "backend": backend,
+            "index_path": index_path,
+            "embedding_backend": embedding_backend,
+            "retrieval": retrieval,
+            "repeat": repeat,
+            "concurrency": concurrency,
+        },
+        "cold_start": {},
+    }
+    cold = report["cold_start"]
+
+    t0 = time.perf_counter()
+    from utils.emoji_searcher import EmojiSearcher
+    from utils.subword_tokenizer import THAI_COMPOUND_EXAMPLES, SubwordTokenizer
+    cold["import_s"] = time.perf_counter() - t0
+
+    searcher_kwargs = dict(backend=backend, index_path=index_path,
+                           embedding_backend=embedding_backend, retrieval=retrieval)
+    t0 = time.perf_counter()
+    searcher = EmojiSearcher(use_result_cache=False, embedding_cache_size=0, **searcher_kwargs)
+    cold["searcher_init_s"] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    searcher.search(MULTILINGUAL_QUERIES[0], n_results=6)
+    cold["first_search_s"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    tokenizer = SubwordTokenizer()
+    cold["tokenizer_init_s"] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    tokenizer.split_compound(THAI_COMPOUND_EXAMPLES[0], max_splits=5, rank="fewest_parts")
+    cold["first_split_s"] = time.perf_counter() - t0
+
+    compounds = THAI_COMPOUND_EXAMPLES + ENGLISH_COMPOUNDS
+    report["corpus"] = {"search_queries": len(MULTILINGUAL_QUERIES), "compounds": len(compounds)}
+
+    # Search, every query embedded and searched
+    report["search_uncached"] = measure(lambda q: searcher.search(q, n_results=6), MULTILINGUAL_QUERIES, repeat)
+    report["search_uncached_concurrent"] = measure_concurrent(
+        lambda q: searcher.search(q, n_results=6), MULTILINGUAL_QUERIES, concurrency, repeat
+    )
+    report["search_many_batch"] = measure(
+        lambda qs: searcher.search_many(qs, n_results=6), [MULTILINGUAL_QUERIES], repeat
+    )
+    report["search_many_batch"]["queries_per_call"] = len(MULTILINGUAL_QUERIES)
+
+    cached_searcher = EmojiSearcher(use_result_cache=True, **searcher_kwargs)
+    cached_searcher.search_many(MULTILINGUAL_QUERIES, n_results=6)
+    report["search_cached"] = measure(lambda q: cached_searcher.search(q, n_results=6), MULTILINGUAL_QUERIES, repeat)
+
+    # Tokenizer, with lattice builds and the dictionary lookups they make counted
+    lattice_calls = count_calls(tokenizer.splitter, "lattice")
+    contains_calls = count_calls(tokenizer.lexicon, "contains")
+    detect_calls = count_calls(tokenizer, "_statistical_detect")
+    report["split_compound"] = measure(
+        lambda w: tokenizer.split_compound(w, max_splits=5, rank="fewest_parts"), compounds, repeat
+    )
+    report["split_compound"].update({
+        "lattice_calls": lattice_calls["calls"],
+        "lexicon_contains_calls": contains_calls["calls"],
+        "langdetect_calls": detect_calls["calls"],
+    })
+    report["split_compound_all"] = measure(lambda w: tokenizer.split_compound(w), compounds, 1)
+
+    # Full query path as app.py runs it (result cache enabled, as in the app)
+    split_table = None
+    if use_split_table:
+        from utils.split_table import SplitTable
+
+        # Built in memory for this run; SplitTable.lookup does not check staleness
+        split_table = SplitTable.build(compounds, cached_searcher, tokenizer)
+    with ThreadPoolExecutor(max_workers=4, thread_name_prefix="emoji-search") as executor:
+        queries = MULTILINGUAL_QUERIES + compounds
+        report["app_query_path"] = measure(
+            lambda q: app_query_path(cached_searcher, tokenizer, executor, q, split_table), queries, repeat
+        )
+        report["app_query_path"]["split_table"] = use_split_table
+
+    report["caches"] = {
+        "embedding": cached_searcher.embedding_cache_stats(),
+        "result": EmojiSearcher.result_cache_stats(),
+    }
+    return report
+
+
+def compare(report: dict, baseline: dict, factor: float = REGRESSION_FACTOR) -> list[str]:
+    """Return the p50/p95 latencies that grew by more than `factor` against a baseline report."""
+    regressions = []
+    for name, section in report.items():
+        base_section = baseline.get(name)
+        if not isinstance(section, dict) or not isinstance(base_section, dict):
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            new, old = section.get(metric), base_section.get(metric)
+            if new is not None and old and new > old * factor:
+                regressions.append(f"{name}.{metric}: {old:.3f}ms -> {new:.3f}ms ({new / old:.2f}x)")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency / throughput benchmarks for search and tokenization.")
+    parser.add_argument("--backend", choices=["chroma", "numpy"], default="chroma")
+    parser.add_argument("--index-path", help="Memory-mapped index directory for the numpy backend.")
+    parser.add_argument("--embedding-backend", choices=["torch", "onnx"], default="torch")
+    parser.add_argument("--retrieval", choices=["semantic", "hybrid", "lexical_first"], default="semantic")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus per benchmark.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Threads for the concurrent search benchmark.")
+    parser.add_argument("--split-table", action="store_true",
+                        help="Serve the compound corpus from a precomputed split table in the app path.")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON report.")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="Baseline report; exit with an error on latency regressions.")
+    args = parser.parse_args()
+
+    report = run_benchmarks(
+        backend=args.backend,
+        index_path=args.index_path,
+        embedding_backend=args.embedding_backend,
+        retrieval=args.retrieval,
+        repeat=args.repeat,
+        concurrency=args.concurrency,
+        use_split_table=args.split_table
+    )
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    for name, section in report.items():
+        if isinstance(section, dict) and "p50_ms" in section:
+            print(f"{name:>28}: p50={section['p50_ms']:.2f}ms p95={section['p95_ms']:.2f}ms "
+                  f"p99={section['p99_ms']:.2f}ms {section['throughput_qps']:.1f} q/s")
+    print(f"Cold start: {json.dumps(report['cold_start'])}")
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f))
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            raise SystemExit(1)
+        print("No regressions.")
@@ -1,173 +1,270 @@
 import streamlit.components.v1 as components
 import html
 
+from utils.lru_cache import LRUCache
+from utils.metrics import timed
+
+# Approximate pixel heights used to size the iframes
+CARD_ROW_HEIGHT = 220
+HEADING_HEIGHT = 50
+CAPTION_HEIGHT = 30
+PAGE_PADDING = 20
+
+# Static part of every component, built once at import. Only the cards and the
+# sections around them change between calls; the grid's column count is a CSS
+# variable set on each grid, so the shell needs no formatting.
+_SHELL_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;600&display=swap" rel="stylesheet">
+<style>
+    body {
+        background-color: transparent;
+        font-family: 'Inter', sans-serif;
+        margin: 0;
+        padding: 10px;
+        color: #ffffff;
+    }
+    .grid {
+        display: grid;
+        grid-template-columns: repeat(var(--columns, 3), 1fr);
+        gap: 15px;
+    }
+    .card {
+        background: rgba(255, 255, 255, 0.05);
+        border: 1px solid rgba(255, 255, 255, 0.1);
+        border-radius: 16px;
+        padding: 20px;
+        text-align: center;
+        cursor: pointer;
+        transition: all 0.3s ease;
+        position: relative;
+        overflow: hidden;
+        display: flex;
+        flex-direction: column;
+        align-items: center;
+        justify-content: center;
+        aspect-ratio: 1;
+        color: #ffffff;
+        backdrop-filter: blur(10px);
+    }
+    .card:hover {
+        transform: translateY(-5px);
+        background: rgba(255, 255, 255, 0.1);
+        border-color: rgba(255, 255, 255, 0.3);
+        box-shadow: 0 8px 32px rgba(0, 0, 0, 0.2);
+    }
+    .char {
+        font-size: 56px;
+        margin-bottom: 8px;
+    }
+    .score {
+        font-size: 12px;
+        color: #787878;
+    }
+    .details {
+        position: absolute;
+        top: 0;
+        left: 0;
+        width: 100%;
+        height: 100%;
+        background: rgba(15, 15, 15, 0.95);
+        display: flex;
+        flex-direction: column;
+        justify-content: center;
+        align-items: center;
+        opacity: 0;
+        transition: opacity 0.2s ease;
+        padding: 15px;
+        box-sizing: border-box;
+        text-align: center;
+    }
+    .card:hover .details {
+        opacity: 1;
+    }
+    .details p {
+        font-size: 13px;
+        line-height: 1.4;
+        color: #e0e0e0;
+        margin: 0 0 10px 0;
+        display: -webkit-box;
+        -webkit-line-clamp: 5;
+        -webkit-box-orient: vertical;
+        overflow: hidden;
+    }
+    .hint {
+        font-size: 11px;
+        color: #4CAF50;
+        font-weight: 600;
+        text-transform: uppercase;
+        letter-spacing: 1px;
+    }
+
+    /* Sections of the combined component */
+    h3, h4 {
+        font-weight: 600;
+        margin: 16px 0 10px 0;
+    }
+    .parts {
+        display: grid;
+        grid-template-columns: repeat(2, 1fr);
+        gap: 15px;
+    }
+    .caption {
+        font-size: 13px;
+        color: #a0a0a0;
+        margin-bottom: 6px;
+    }
+    hr {
+        border: none;
+        border-top: 1px solid rgba(255, 255, 255, 0.15);
+        margin: 20px 0;
+    }
+
+    /* Toast Notification */
+    .toast {
+        position: fixed;
+        top: 20px;
+        right: 20px;
+        background: #4CAF50;
+        color: white;
+        padding: 12px 24px;
+        border-radius: 50px;
+        box-shadow: 0 4px 15px rgba(0,0,0,0.3);
+        font-size: 14px;
+        font-weight: 600;
+        transform: translateX(200%);
+        transition: transform 0.4s cubic-bezier(0.68, -0.55, 0.265, 1.55);
+        display: flex;
+        align-items: center;
+        gap: 8px;
+        z-index: 1000;
+    }
+    .toast.show {
+        transform: translateX(0);
+    }
+</style>
+</head>
+<body>
+
+    <div id="notification" class="toast">
+        <span>✅ Copied to clipboard!</span>
+    </div>
+"""
+
+_SHELL_TAIL = """
+    <script>
+        // One listener for every card; each card carries its emoji in data-char
+        document.addEventListener('click', function(event) {
+            const card = event.target.closest('.card');
+            if (card) {
+                copyToClipboard(card.dataset.char);
+            }
+        });
+
+        function copyToClipboard(text) {
+            navigator.clipboard.writeText(text).then(function() {
+                showToast();
+            }, function(err) {
+                console.error('Async: Could not copy text: ', err);
+            });
+        }
+
+        function showToast() {
+            const toast = document.getElementById('notification');
+            toast.classList.add('show');
+            setTimeout(() => {
+                toast.classList.remove('show');
+            }, 2000);
+        }
+    </script>
+</body>
+</html>
+"""
+
+# Escaped card markup around the score, keyed by (emoji id, document) so a rebuilt
+# collection with new descriptions never serves a stale card
+_CARD_CACHE = LRUCache(max_size=4096)
+
+
+def _card_fragments(res) -> tuple[str, str]:
+    """Return the (before score, after score) markup of one result's card."""
+    key = (res['id'], res['document'])
+    fragments = _CARD_CACHE.get(key)
+    if fragments is None:
+        char = html.escape(res['metadata'].get('character', '❓'))
+        # Escape the document text to prevent HTML injection issues and handle special chars
+        desc = html.escape(res['document'])
+        fragments = (
+            f'<div class="card" data-char="{char}"><div class="char">{char}</div><div class="score">Match: ',
+            f'</div><div class="details"><p>{desc}</p><span class="hint">Click to Copy</span></div></div>'
+        )
+        _CARD_CACHE.put(key, fragments)
+    return fragments
+
+
+def _grid_html(results, columns: int) -> str:
+    parts = [f'<div class="grid" style="--columns: {columns}">']
+    for res in results:
+        before, after = _card_fragments(res)
+        parts += (before, f"{1 - res['distance']:.4f}", after)
+    parts.append('</div>')
+    return "".join(parts)
+
+
+def _grid_height(count: int, columns: int) -> int:
+    # Calculate height based on rows (approx 200px per row + gap)
+    return (count + columns - 1) // columns * CARD_ROW_HEIGHT
+
+
+def _page(body: str) -> str:
+    return _SHELL_HEAD + body + _SHELL_TAIL
+
+
+@timed("render_emoji_grid")
 def render_emoji_grid(results, columns=3):
     """
     Renders a responsive grid of emoji cards with hover details and copy-to-clipboard functionality.
     """
-    cards_html = ""
-    for res in results:
-        char = res['metadata'].get('character', '❓')
-        # Escape the document text to prevent HTML injection issues and handle special chars
-        desc = html.escape(res['document'])
-        score = 1 - res['distance']
-        
-        cards_html += f"""
-        <div class="card" onclick="copyToClipboard('{char}')">
-            <div class="char">{char}</div>
-            <div class="score">Match: {score:.4f}</div>
-            <div class="details">
-                <p>{desc}</p>
-                <span class="hint">Click to Copy</span>
-            </div>
-        </div>
-        """
-        
-    # Complete HTML Component
-    component_code = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;600&display=swap" rel="stylesheet">
-    <style>
-        body {{
-            background-color: transparent;
-            font-family: 'Inter', sans-serif;
-            margin: 0;
-            padding: 10px;
-        }}
-        .grid {{
-            display: grid;
-            grid-template-columns: repeat({columns}, 1fr);
-            gap: 15px;
-        }}
-        .card {{
-            background: rgba(255, 255, 255, 0.05);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            border-radius: 16px;
-            padding: 20px;
-            text-align: center;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            position: relative;
-            overflow: hidden;
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            justify-content: center;
-            aspect-ratio: 1;
-            color: #ffffff;
-            backdrop-filter: blur(10px);
-        }}
-        .card:hover {{
-            transform: translateY(-5px);
-            background: rgba(255, 255, 255, 0.1);
-            border-color: rgba(255, 255, 255, 0.3);
-            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.2);
-        }}
-        .char {{
-            font-size: 56px;
-            margin-bottom: 8px;
-        }}
-        .score {{
-            font-size: 12px;
-            color: #787878;
-        }}
-        .details {{
-            position: absolute;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            background: rgba(15, 15, 15, 0.95);
-            display: flex;
-            flex-direction: column;
-            justify-content: center;
-            align-items: center;
-            opacity: 0;
-            transition: opacity 0.2s ease;
-            padding: 15px;
-            box-sizing: border-box;
-            text-align: center;
-        }}
-        .card:hover .details {{
-            opacity: 1;
-        }}
-        .details p {{
-            font-size: 13px;
-            line-height: 1.4;
-            color: #e0e0e0;
-            margin: 0 0 10px 0;
-            display: -webkit-box;
-            -webkit-line-clamp: 5;
-            -webkit-box-orient: vertical;
-            overflow: hidden;
-        }}
-        .hint {{
-            font-size: 11px;
-            color: #4CAF50;
-            font-weight: 600;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-        }}
-        
-        /* Toast Notification */
-        .toast {{
-            position: fixed;
-            top: 20px;
-            right: 20px;
-            background: #4CAF50;
-            color: white;
-            padding: 12px 24px;
-            border-radius: 50px;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.3);
-            font-size: 14px;
-            font-weight: 600;
-            transform: translateX(200%);
-            transition: transform 0.4s cubic-bezier(0.68, -0.55, 0.265, 1.55);
-            display: flex;
-            align-items: center;
-            gap: 8px;
-            z-index: 1000;
-        }}
-        .toast.show {{
-            transform: translateX(0);
-        }}
-    </style>
-    </head>
-    <body>
-        
-        <div id="notification" class="toast">
-            <span>✅ Copied to clipboard!</span>
-        </div>
-
-        <div class="grid">
-            {cards_html}
-        </div>
-
-        <script>
-            function copyToClipboard(text) {{
-                navigator.clipboard.writeText(text).then(function() {{
-                    showToast();
-                }}, function(err) {{
-                    console.error('Async: Could not copy text: ', err);
-                }});
-            }}
-
-            function showToast() {{
-                const toast = document.getElementById('notification');
-                toast.classList.add('show');
-                setTimeout(() => {{
-                    toast.classList.remove('show');
-                }}, 2000);
-            }}
-        </script>
-    </body>
-    </html>
+    components.html(_page(_grid_html(results, columns)), height=_grid_height(len(results), columns) + PAGE_PADDING)
+
+
+@timed("render_emoji_page")
+def render_emoji_page(query, results, splits, columns=3, part_columns=2):
     """
-    
-    # Calculate height based on rows (approx 200px per row + gap)
-    rows = (len(results) + columns - 1) // columns
-    height = rows * 220 + 20 
-    
-    components.html(component_code, height=height)
+    Renders the main results and every compound breakdown as one component, so the
+    page ships the stylesheet and script once instead of once per grid.
+
+    Args:
+        query (str): The search text, shown in the results heading.
+        results (Sequence): Main search results (shown only if non-empty).
+        splits (list[list[tuple[str, Sequence]]]): Compound breakdown options, each a
+            list of (part, part results) as returned by `search_split` in app.py.
+        columns (int): Columns of the main grid.
+        part_columns (int): Columns of each part's grid.
+    """
+    body, height = [], PAGE_PADDING
+    if results:
+        body.append(f"<h3>Results for <em>'{html.escape(query)}'</em></h3>")
+        body.append(_grid_html(results, columns))
+        height += HEADING_HEIGHT + _grid_height(len(results), columns)
+
+    if splits:
+        body.append("<hr><h3>Compound Breakdowns</h3>")
+        height += 2 * HEADING_HEIGHT
+    for idx, split_group in enumerate(splits):
+        words = " + ".join(f"<strong>{html.escape(word)}</strong>" for word, _ in split_group)
+        body.append(f"<h4>Option {idx + 1}: {words}</h4><div class=\"parts\">")
+        height += HEADING_HEIGHT
+        # Parts are laid out two per row, as in the per-part layout of app.py
+        for i in range(0, len(split_group), 2):
+            row_height = 0
+            for word, sub_res in split_group[i:i + 2]:
+                body.append(f"<div><div class=\"caption\">'{html.escape(word)}'</div>")
+                body.append(_grid_html(sub_res, part_columns) if sub_res else "<div>-</div>")
+                body.append("</div>")
+                row_height = max(row_height, _grid_height(len(sub_res), part_columns) or CAPTION_HEIGHT)
+            height += CAPTION_HEIGHT + row_height
+        body.append("</div>")
+
+    components.html(_page("".join(body)), height=height)
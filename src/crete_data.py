@@ -1,83 +1,333 @@
 from datasets import load_dataset
 import chromadb
 from chromadb.utils import embedding_functions
+import argparse
+import hashlib
+import json
+import multiprocessing
 import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
-def create_vector_db():
-    # Load the dataset
-    print("Loading dataset...")
-    try:
-        ds = load_dataset("badrex/LLM-generated-emoji-descriptions")
-    except Exception as e:
-        print(f"Error loading dataset: {e}")
+# Ensure we can import from utils
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.collection_version import bump_collection_version, new_collection_version, read_active_collection
+from utils.emoji_index_file import write_index_file
+from utils.emoji_searcher import COLLECTION_MODELS, resolve_collection
+from utils.numpy_index import NumpyIndex
+
+DATASET_NAME = "badrex/LLM-generated-emoji-descriptions"
+# Default collection; --collection builds another one (e.g. "e5") side by side
+COLLECTION_NAME = "LLM-generated-emoji-multilingual-MiniLM-L12-v2"
+MODEL_NAME = COLLECTION_MODELS[COLLECTION_NAME]
+
+def export_index(collection, export_path, dtype="float32", collection_version=None):
+    """
+    Export a collection to the memory-mappable index format read by
+    `utils.emoji_index_file.EmojiIndexFile` (used by the "numpy" search backend).
+    Returns the directory written, which `export_path` now links to.
+    """
+    print(f"Exporting {dtype} index to {export_path}...")
+    index = NumpyIndex.from_collection(collection)
+    index_dir = write_index_file(
+        export_path,
+        index.ids,
+        index.embeddings,
+        index.documents,
+        index.metadatas,
+        space=index.space,
+        dtype=dtype,
+        collection_name=collection.name,
+        collection_version=collection_version
+    )
+    print(f"Exported {len(index)} emojis.")
+    return index_dir
+
+def content_hash(document: str, metadata: dict) -> str:
+    """Hash of everything stored for an emoji, used to detect changed rows on refresh."""
+    payload = json.dumps([document, metadata], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def to_record(item: dict) -> tuple[str, str, dict]:
+    """
+    Turn one dataset row into the (id, document, metadata) stored in ChromaDB.
+    The metadata carries a `content_hash` of the rest of the record.
+    """
+    # Extract fields
+    char = item.get('character', '')
+    unicode_val = item.get('unicode', '')
+    short_desc = item.get('short description', '')
+    llm_desc = item.get('LLM description', '')
+    tags = item.get('tags', [])
+
+    # Combine descriptions for the document
+    document_content = f"{short_desc}. {llm_desc}"
+    metadata = {
+        "character": char,
+        "unicode": unicode_val,
+        "tags": ", ".join(tags)
+    }
+    metadata["content_hash"] = content_hash(document_content, metadata)
+    return unicode_val, document_content, metadata
+
+def iter_batches(rows, batch_size: int):
+    """Group an iterable of records into lists of at most `batch_size`."""
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        yield batch
+
+# Encoder of a worker process, loaded once by `_init_encoder`
+_worker_ef = None
+
+def _init_encoder(model_name: str):
+    global _worker_ef
+    _worker_ef = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=model_name)
+
+def _encode(documents: list[str]) -> list:
+    return [emb.tolist() for emb in _worker_ef(documents)]
+
+def encode_batches(batches, ef, model_name: str, workers: int = 1):
+    """
+    Yield (batch, embeddings) in order, encoding in this process or across a process
+    pool of encoders. At most two batches per worker are in flight, so the dataset is
+    never fully held in memory.
+    """
+    if workers <= 1:
+        for batch in batches:
+            yield batch, ef([document for _, document, _ in batch])
         return
 
+    # Spawned rather than forked: forking a process that already loaded torch can deadlock
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_encoder, initargs=(model_name,)) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append((batch, pool.submit(_encode, [document for _, document, _ in batch])))
+            if len(pending) >= 2 * workers:
+                batch, future = pending.popleft()
+                yield batch, future.result()
+        while pending:
+            batch, future = pending.popleft()
+            yield batch, future.result()
+
+def load_checkpoint(path: str) -> dict | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_checkpoint(path: str, checkpoint: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+def create_vector_db(export_path=None, export_dtype="float32", batch_size=256, workers=1, resume=True):
+    """
+    Rebuild the emoji collection without the live app ever seeing it missing.
+
+    Dataset rows are streamed and embedded in batches (optionally across a process pool
+    of encoders) and upserted into a new staging collection, with a checkpoint after
+    every batch so an interrupted build resumes from the last completed batch. When the
+    build is complete the collection stamp is switched to the new collection in one
+    atomic file replace; the collection it replaces is kept until the next rebuild so
+    searchers still holding it keep working until they notice the switch.
+    """
     # Initialize ChromaDB
     # Using a persistent client to save the data to disk
     db_path = os.path.join(os.getcwd(), "chroma_db")
     print(f"Using ChromaDB path: {db_path}")
     client = chromadb.PersistentClient(path=db_path)
-    
+
     # Initialize Embedding Function
-    # sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(model_name="intfloat/multilingual-e5-base")
-    sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
-    
-    # Create or get collection
-    collection_name = "LLM-generated-emoji-multilingual-MiniLM-L12-v2"
+    sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=MODEL_NAME)
+
+    checkpoint_path = os.path.join(db_path, f"{COLLECTION_NAME}.build.json")
+    existing = [c.name for c in client.list_collections()]
+    checkpoint = load_checkpoint(checkpoint_path) if resume else None
+    if checkpoint and (checkpoint.get("batch_size") != batch_size or checkpoint.get("staging") not in existing):
+        print("Checkpoint does not match this build, starting over.")
+        checkpoint = None
+
     try:
-        # Delete if exists to start fresh (optional, but good for 'create' script)
-        if collection_name in [c.name for c in client.list_collections()]:
-            print("Delete old collection")
-            client.delete_collection(collection_name)
-        
-        print("Create new collection with paraphrase-multilingual-MiniLM-L12-v2 embedding")
-        collection = client.create_collection(name=collection_name, embedding_function=sentence_transformer_ef)
+        if checkpoint:
+            staging_name = checkpoint["staging"]
+            print(f"Resuming {staging_name} after batch {checkpoint['completed_batches']}")
+            collection = client.get_collection(name=staging_name, embedding_function=sentence_transformer_ef)
+        else:
+            staging_name = f"{COLLECTION_NAME}-build-{time.strftime('%Y%m%d%H%M%S')}"
+            print(f"Create new collection {staging_name} with {MODEL_NAME} embedding")
+            collection = client.create_collection(name=staging_name, embedding_function=sentence_transformer_ef)
+            checkpoint = {"staging": staging_name, "batch_size": batch_size, "completed_batches": 0, "rows": 0}
+            save_checkpoint(checkpoint_path, checkpoint)
     except Exception as e:
         print(f"Error creating collection: {e}")
         return
 
-    ids = []
-    documents = []
-    metadatas = []
-
-    print("Processing data...")
-    # ds is a DatasetDict, access the 'train' split
-    if 'train' in ds:
-        data = ds['train']
-    else:
-        print("Dataset does not contain 'train' split.")
+    # Load the dataset
+    print("Streaming dataset...")
+    try:
+        data = load_dataset(DATASET_NAME, split="train", streaming=True)
+    except Exception as e:
+        print(f"Error loading dataset: {e}")
         return
 
-    for item in data:
-        # Extract fields
-        char = item.get('character', '')
-        unicode_val = item.get('unicode', '')
-        short_desc = item.get('short description', '')
-        llm_desc = item.get('LLM description', '')
-        tags = item.get('tags', [])
-
-        # Combine descriptions for the document
-        document_content = f"{short_desc}. {llm_desc}"
-        
-        ids.append(unicode_val)
-        documents.append(document_content)
-        metadatas.append({
-            "character": char,
-            "unicode": unicode_val,
-            "tags": ", ".join(tags)
-        })
-
-    # Batch add to ChromaDB
-    if ids:
-        print(f"Adding {len(ids)} documents to ChromaDB...")
-        collection.add(
-            ids=ids,
-            documents=documents,
-            metadatas=metadatas
+    batches = iter_batches((to_record(item) for item in data), batch_size)
+    # Batches finished before an interruption are skipped without re-embedding
+    batches = islice(batches, checkpoint["completed_batches"], None)
+
+    start = time.perf_counter()
+    for batch, embeddings in encode_batches(batches, sentence_transformer_ef, MODEL_NAME, workers):
+        collection.upsert(
+            ids=[record[0] for record in batch],
+            embeddings=embeddings,
+            documents=[record[1] for record in batch],
+            metadatas=[record[2] for record in batch]
         )
-        print("Data indexed successfully.")
-    else:
+        checkpoint["completed_batches"] += 1
+        checkpoint["rows"] += len(batch)
+        save_checkpoint(checkpoint_path, checkpoint)
+        elapsed = time.perf_counter() - start
+        print(f"Batch {checkpoint['completed_batches']}: {checkpoint['rows']} rows indexed ({elapsed:.1f}s)")
+
+    if not checkpoint["rows"]:
         print("No data to index.")
+        return
+
+    # Export first, so a searcher reloading on the new stamp finds the matching index
+    version = new_collection_version()
+    index_dir = None
+    if export_path:
+        index_dir = export_index(collection, export_path, dtype=export_dtype, collection_version=version)
+
+    # Switch searchers over to the new collection, then drop the one retired last time
+    retired = read_active_collection(db_path, COLLECTION_NAME)
+    version = bump_collection_version(db_path, COLLECTION_NAME, active_collection=staging_name,
+                                      version=version, index_path=index_dir)
+    os.remove(checkpoint_path)
+    print(f"Data indexed successfully (collection version {version}).")
+
+    for name in existing:
+        is_ours = name == COLLECTION_NAME or name.startswith(f"{COLLECTION_NAME}-build-")
+        if is_ours and name not in (staging_name, retired):
+            print(f"Delete old collection {name}")
+            client.delete_collection(name)
+
+def existing_hashes(collection, batch_size=5000) -> dict[str, str]:
+    """Return {id: content_hash} for every emoji in the collection ("" if never hashed)."""
+    hashes = {}
+    for offset in range(0, collection.count(), batch_size):
+        batch = collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+        for emoji_id, metadata in zip(batch["ids"], batch["metadatas"]):
+            hashes[emoji_id] = (metadata or {}).get("content_hash", "")
+    return hashes
+
+def update_vector_db(export_path=None, export_dtype="float32", batch_size=256, workers=1):
+    """
+    Refresh the live collection in place, embedding only what changed.
+
+    Dataset rows whose content hash matches the stored one are skipped; new and changed
+    rows are embedded and upserted, and emojis no longer in the dataset are deleted.
+    Falls back to a full `create_vector_db` when there is no collection yet.
+    """
+    db_path = os.path.join(os.getcwd(), "chroma_db")
+    print(f"Using ChromaDB path: {db_path}")
+    client = chromadb.PersistentClient(path=db_path)
+    active_name = read_active_collection(db_path, COLLECTION_NAME)
+
+    try:
+        collection = client.get_collection(name=active_name)
+    except Exception as e:
+        print(f"Collection '{active_name}' not found ({e}), running a full build.")
+        return create_vector_db(export_path, export_dtype, batch_size=batch_size, workers=workers)
+
+    stored = existing_hashes(collection)
+    print(f"{len(stored)} emojis in '{active_name}'")
+
+    print("Streaming dataset...")
+    try:
+        data = load_dataset(DATASET_NAME, split="train", streaming=True)
+    except Exception as e:
+        print(f"Error loading dataset: {e}")
+        return
+
+    seen = set()
+    changed = []
+    for item in data:
+        record = to_record(item)
+        seen.add(record[0])
+        if stored.get(record[0]) != record[2]["content_hash"]:
+            changed.append(record)
+    removed = [emoji_id for emoji_id in stored if emoji_id not in seen]
+    print(f"{len(changed)} new or changed, {len(removed)} removed, "
+          f"{len(seen) - len(changed)} unchanged")
+
+    if not changed and not removed:
+        print("Collection is up to date.")
+        return
+
+    if changed:
+        # Only the changed rows need the model
+        sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=MODEL_NAME)
+        batches = iter_batches(changed, batch_size)
+        for batch, embeddings in encode_batches(batches, sentence_transformer_ef, MODEL_NAME, workers):
+            collection.upsert(
+                ids=[record[0] for record in batch],
+                embeddings=embeddings,
+                documents=[record[1] for record in batch],
+                metadatas=[record[2] for record in batch]
+            )
+            print(f"Upserted {len(batch)} emojis")
+
+    if removed:
+        collection.delete(ids=removed)
+        print(f"Deleted {len(removed)} emojis")
+
+    version = new_collection_version()
+    index_dir = None
+    if export_path:
+        index_dir = export_index(collection, export_path, dtype=export_dtype, collection_version=version)
+
+    # Invalidate search result caches of running apps
+    version = bump_collection_version(db_path, COLLECTION_NAME, version=version, index_path=index_dir)
+    print(f"Data indexed successfully (collection version {version}).")
 
 if __name__ == "__main__":
-    create_vector_db()
+    parser = argparse.ArgumentParser(description="Build the emoji ChromaDB collection.")
+    parser.add_argument("--collection", default=COLLECTION_NAME,
+                        help="Collection to build (name or alias: minilm, e5); each has its own model.")
+    parser.add_argument("--export-index", metavar="DIR",
+                        help="Also export a memory-mappable index directory for the numpy backend.")
+    parser.add_argument("--index-dtype", choices=["float32", "float16"], default="float32",
+                        help="Storage type of the exported embedding matrix.")
+    parser.add_argument("--batch-size", type=int, default=256, help="Rows embedded and upserted per batch.")
+    parser.add_argument("--workers", type=int, default=1, help="Encoder processes (1 = encode in this process).")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore any checkpoint and start a fresh build.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Update the live collection in place, re-embedding only new or changed emojis.")
+    args = parser.parse_args()
+
+    COLLECTION_NAME = resolve_collection(args.collection)
+    MODEL_NAME = COLLECTION_MODELS[COLLECTION_NAME]
+
+    if args.incremental:
+        update_vector_db(
+            export_path=args.export_index,
+            export_dtype=args.index_dtype,
+            batch_size=args.batch_size,
+            workers=args.workers
+        )
+    else:
+        create_vector_db(
+            export_path=args.export_index,
+            export_dtype=args.index_dtype,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            resume=not args.no_resume
+        )
@@ -0,0 +1,252 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+# Ensure we can import from utils
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.benchmark import git_commit, percentiles
+
+DEFAULT_LABELS_PATH = "eval_queries.jsonl"
+DEFAULT_KS = (1, 5, 10)
+
+# Tags shared by more emojis than this say too little about any one of them to be a label
+MAX_TAG_EMOJIS = 5
+
+# Searcher configurations compared by default: EmojiSearcher keyword arguments by name.
+# More can be given in a JSON file with --config. Re-ranking reads the exported index
+# (python src/crete_data.py --export-index emoji_index).
+BACKENDS = {
+    "chroma": {"backend": "chroma"},
+    "numpy": {"backend": "numpy"},
+    "numpy-float16": {"backend": "numpy", "quantization": "float16"},
+    "numpy-int8": {"backend": "numpy", "quantization": "int8"},
+    "numpy-int8-rerank": {"backend": "numpy", "quantization": "int8", "rerank": 50, "index_path": "emoji_index"},
+    "hybrid": {"backend": "chroma", "retrieval": "hybrid"},
+    "lexical_first": {"backend": "chroma", "retrieval": "lexical_first"},
+}
+DEFAULT_BACKENDS = ("chroma", "numpy", "numpy-int8-rerank", "hybrid")
+
+
+def go_offline():
+    """Make every library read only local files: the local chroma_db and cached models."""
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+    os.environ.setdefault("HF_DATASETS_OFFLINE", "1")
+    os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+
+def read_labels(path: str) -> list[dict]:
+    """
+    Read a labeled query file: one JSON object per line with "query", "expected" (emoji
+    ids, any of which counts as a hit) and an optional "source". Blank lines are skipped.
+    """
+    labels = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            label = json.loads(line)
+            if not label.get("query") or not label.get("expected"):
+                raise ValueError(f"{path}:{line_no}: expected a 'query' and a non-empty 'expected' list")
+            labels.append(label)
+    return labels
+
+
+def write_labels(labels: list[dict], path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        for label in labels:
+            f.write(json.dumps(label, ensure_ascii=False) + "\n")
+
+
+def seed_labels(table, sample: int = 500, seed: int = 0) -> list[dict]:
+    """
+    Labeled queries from the collection itself: each sampled emoji's short description
+    and its rarer tags (the fields src/crete_data.py indexes), expecting every emoji
+    that has that description or tag.
+
+    Args:
+        table (EmojiTable): Ids, documents and metadata of the collection.
+        sample (int): Emojis sampled for queries.
+        seed (int): Sampling seed, so seeded files are reproducible.
+    """
+    from utils.lexical_index import normalize_phrase, short_description
+
+    by_description, by_tag = {}, {}
+    for row, (document, metadata) in enumerate(zip(table.documents, table.metadatas)):
+        by_description.setdefault(normalize_phrase(short_description(document)), []).append(row)
+        for tag in (metadata or {}).get("tags", "").split(","):
+            if normalize_phrase(tag):
+                by_tag.setdefault(normalize_phrase(tag), []).append(row)
+
+    rng = random.Random(seed)
+    rows = rng.sample(range(len(table)), min(sample, len(table)))
+
+    labels, seen = [], set()
+    for row in rows:
+        queries = [(short_description(table.documents[row]).strip(), "short_description")]
+        queries += [(tag.strip(), "tag") for tag in (table.metadatas[row] or {}).get("tags", "").split(",")]
+        for query, source in queries:
+            key = normalize_phrase(query)
+            if not key or key in seen:
+                continue
+            expected = by_description[key] if source == "short_description" else by_tag[key]
+            if source == "tag" and len(expected) > MAX_TAG_EMOJIS:
+                continue
+            seen.add(key)
+            labels.append({"query": query, "expected": [table.ids[r] for r in expected], "source": source})
+    return labels
+
+
+def score(results_ids: list[str], expected: set, ks) -> dict:
+    """recall@k for every k (hits over the expected ids that fit in k) and the reciprocal rank."""
+    metrics = {}
+    for k in ks:
+        hits = len(expected.intersection(results_ids[:k]))
+        metrics[f"recall@{k}"] = hits / min(len(expected), k)
+    rank = next((i for i, emoji_id in enumerate(results_ids, start=1) if emoji_id in expected), None)
+    metrics["mrr"] = 1.0 / rank if rank else 0.0
+    return metrics
+
+
+def mean_metrics(rows: list[dict]) -> dict:
+    if not rows:
+        return {}
+    return {name: sum(row[name] for row in rows) / len(rows) for name in rows[0]}
+
+
+def evaluate_backend(searcher, labels: list[dict], ks=DEFAULT_KS) -> dict:
+    """
+    Run every labeled query once through `searcher.search` and return the mean
+    recall@k and MRR (overall and per label source) and the latency percentiles.
+    """
+    n_results = max(ks)
+    per_query, by_source, latencies = [], {}, []
+    for label in labels:
+        start = time.perf_counter()
+        results = searcher.search(label["query"], n_results=n_results)
+        latencies.append(1000 * (time.perf_counter() - start))
+
+        metrics = score([hit["id"] for hit in results], set(label["expected"]), ks)
+        per_query.append(metrics)
+        by_source.setdefault(label.get("source", "manual"), []).append(metrics)
+
+    return {
+        **mean_metrics(per_query),
+        "latency": percentiles(latencies),
+        "by_source": {source: {**mean_metrics(rows), "queries": len(rows)} for source, rows in by_source.items()},
+    }
+
+
+def run_evaluation(labels: list[dict], backends: dict, ks=DEFAULT_KS, collection_name=None,
+                   embedding_backend="torch", warm_up_queries: int = 5) -> dict:
+    """
+    Evaluate each configuration in `backends` (name -> EmojiSearcher keyword arguments)
+    on the same labels, one searcher at a time.
+
+    Caches are disabled so every query is embedded and searched, and each searcher
+    answers a few throwaway queries first so model loading is not counted as latency.
+    """
+    from utils.emoji_searcher import EmojiSearcher
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "collection": collection_name,
+            "embedding_backend": embedding_backend,
+            "queries": len(labels),
+            "ks": list(ks),
+        },
+        "backends": {},
+    }
+    for name, kwargs in backends.items():
+        print(f"Evaluating {name}...")
+        kwargs = {"embedding_backend": embedding_backend, **kwargs}
+        if collection_name:
+            kwargs.setdefault("collection_name", collection_name)
+        try:
+            searcher = EmojiSearcher(use_result_cache=False, embedding_cache_size=0, **kwargs)
+            for label in labels[:warm_up_queries]:
+                searcher.search(label["query"], n_results=max(ks))
+            report["backends"][name] = {"config": kwargs, **evaluate_backend(searcher, labels, ks)}
+            searcher.unload()
+        except Exception as e:
+            print(f"Error evaluating {name}: {e}")
+            report["backends"][name] = {"config": kwargs, "error": str(e)}
+    return report
+
+
+def format_report(report: dict) -> str:
+    """Side-by-side table of every backend's quality and latency."""
+    ks = report["meta"]["ks"]
+    columns = [f"recall@{k}" for k in ks] + ["mrr"]
+    lines = [f"{'backend':>20} " + " ".join(f"{c:>9}" for c in columns) + f" {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"]
+    for name, result in report["backends"].items():
+        if "error" in result:
+            lines.append(f"{name:>20} error: {result['error']}")
+            continue
+        latency = result["latency"]
+        lines.append(
+            f"{name:>20} " + " ".join(f"{result[c]:>9.4f}" for c in columns)
+            + f" {latency['p50_ms']:>8.2f} {latency['p95_ms']:>8.2f} {latency['p99_ms']:>8.2f}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline recall / MRR / latency evaluation of search backends.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = subparsers.add_parser("seed", help="Write a labeled query file from the local collection.")
+    seed_parser.add_argument("--collection", default="minilm", help="Collection to read (name or alias).")
+    seed_parser.add_argument("--sample", type=int, default=500, help="Emojis sampled for queries.")
+    seed_parser.add_argument("--seed", type=int, default=0, help="Sampling seed.")
+    seed_parser.add_argument("--output", default=DEFAULT_LABELS_PATH, help="Labeled query file to write.")
+
+    run_parser = subparsers.add_parser("run", help="Evaluate backends on a labeled query file.")
+    run_parser.add_argument("--labels", default=DEFAULT_LABELS_PATH, help="Labeled query file (JSON lines).")
+    run_parser.add_argument("--collection", default="minilm", help="Collection to search (name or alias).")
+    run_parser.add_argument("--backends", nargs="+", default=list(DEFAULT_BACKENDS),
+                            help=f"Configurations to compare, from: {', '.join(BACKENDS)} (or --config).")
+    run_parser.add_argument("--config", metavar="PATH",
+                            help="JSON file of extra configurations: name -> EmojiSearcher arguments.")
+    run_parser.add_argument("--embedding-backend", choices=["torch", "onnx"], default="torch")
+    run_parser.add_argument("--k", type=int, nargs="+", default=list(DEFAULT_KS), help="Cutoffs for recall@k.")
+    run_parser.add_argument("--output", default="evaluation_results.json", help="Where to write the JSON report.")
+
+    args = parser.parse_args()
+    go_offline()
+
+    if args.command == "seed":
+        from utils.emoji_searcher import EmojiSearcher
+
+        searcher = EmojiSearcher(collection_name=args.collection, use_result_cache=False)
+        if searcher.table is None:
+            raise SystemExit("Collection not loaded.")
+        labels = seed_labels(searcher.table, sample=args.sample, seed=args.seed)
+        write_labels(labels, args.output)
+        print(f"Wrote {len(labels)} labeled queries to {args.output}")
+    else:
+        configs = dict(BACKENDS)
+        if args.config:
+            with open(args.config, encoding="utf-8") as f:
+                configs.update(json.load(f))
+        unknown = [name for name in args.backends if name not in configs]
+        if unknown:
+            raise SystemExit(f"Unknown backends: {', '.join(unknown)}")
+
+        report = run_evaluation(
+            read_labels(args.labels),
+            {name: configs[name] for name in args.backends},
+            ks=sorted(set(args.k)),
+            collection_name=args.collection,
+            embedding_backend=args.embedding_backend
+        )
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(format_report(report))
+        print(f"Wrote {args.output}")
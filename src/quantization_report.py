@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Ensure we can import from utils
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.emoji_index_file import write_index_file
+from utils.emoji_searcher import EmojiSearcher
+from utils.numpy_index import NumpyIndex
+from utils.subword_tokenizer import MULTILINGUAL_QUERIES
+
+
+def recall_at_k(approx_ids: list[list[str]], reference_ids: list[list[str]], k: int) -> float:
+    """Mean fraction of each query's reference top-k found in the approximate top-k."""
+    if not reference_ids:
+        return 0.0
+    hits = [
+        len(set(approx[:k]) & set(reference[:k])) / max(len(reference[:k]), 1)
+        for approx, reference in zip(approx_ids, reference_ids)
+    ]
+    return sum(hits) / len(hits)
+
+
+def run_report(collection_name="LLM-generated-emoji-multilingual-MiniLM-L12-v2", k=6, rerank=50, sample=200, seed=0):
+    """
+    Compare float32 / float16 / int8 in-memory indexes (with and without exact
+    re-ranking) against the ChromaDB collection's own results.
+
+    Re-ranking configurations read their float32 vectors from a memory-mapped export
+    (written to a temporary directory), as they do in the app, so "index_mb" counts
+    only the quantized vectors held in memory.
+
+    Returns:
+        list[dict]: One row per configuration.
+    """
+    searcher = EmojiSearcher(collection_name=collection_name, use_result_cache=False)
+    if not searcher.collection:
+        print("Collection not loaded.")
+        return []
+
+    base = NumpyIndex.from_collection(searcher.collection)
+
+    # The shared multilingual queries, topped up with sampled short descriptions
+    queries = list(MULTILINGUAL_QUERIES)
+    rng = random.Random(seed)
+    rows = rng.sample(range(len(base)), min(sample, len(base)))
+    # Document text is "<short description>. <LLM description>"
+    queries += [base.documents[r].split(". ")[0] for r in rows]
+
+    embeddings = searcher.embed(queries)
+    reference = searcher.collection.query(query_embeddings=embeddings, n_results=k)["ids"]
+
+    configs = [(None, 0), ("float16", 0), ("int8", 0)]
+    if rerank:
+        configs += [("float16", rerank), ("int8", rerank)]
+
+    report = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        export_path = os.path.join(tmp_dir, "index")
+        write_index_file(export_path, base.ids, base.embeddings, base.documents, base.metadatas, space=base.space)
+
+        for quantization, rerank_n in configs:
+            if rerank_n:
+                index = NumpyIndex.load(export_path, quantization=quantization, rerank=rerank_n)
+            else:
+                index = NumpyIndex(
+                    base.ids, base.embeddings, base.documents, base.metadatas,
+                    space=base.space, quantization=quantization
+                )
+            start = time.perf_counter()
+            results = index.query(embeddings, n_results=k)
+            elapsed = time.perf_counter() - start
+
+            report.append({
+                "quantization": quantization or "float32",
+                "rerank": rerank_n,
+                "index_mb": index.memory_bytes() / 2**20,
+                f"recall@{k}": recall_at_k(results["ids"], reference, k),
+                "ms_per_query": 1000 * elapsed / len(queries),
+            })
+            del index
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall@k of quantized indexes vs. ChromaDB.")
+    parser.add_argument("--collection", default="LLM-generated-emoji-multilingual-MiniLM-L12-v2",
+                        help="Collection to evaluate.")
+    parser.add_argument("--k", type=int, default=6, help="Number of results compared per query.")
+    parser.add_argument("--rerank", type=int, default=50, help="Candidates re-ranked exactly (0 to skip).")
+    parser.add_argument("--sample", type=int, default=200, help="Short descriptions sampled as extra queries.")
+    parser.add_argument("--json", metavar="PATH", help="Also write the report as JSON.")
+    args = parser.parse_args()
+
+    report = run_report(collection_name=args.collection, k=args.k, rerank=args.rerank, sample=args.sample)
+    for row in report:
+        print(f"{row['quantization']:>8} rerank={row['rerank']:<4} "
+              f"index={row['index_mb']:.2f}MB recall@{args.k}={row[f'recall@{args.k}']:.4f} "
+              f"{row['ms_per_query']:.3f}ms/query")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
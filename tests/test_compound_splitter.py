@@ -0,0 +1,99 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.compound_splitter import CompoundSplitter, PrefixTrie
+
+# Irregular English forms WordNet's morphy finds through its exception lists
+IRREGULAR = {"geese": "goose", "mice": "mouse"}
+
+
+class FakeLexicon:
+    """Lemma sets per language; English `contains` also accepts regular "-s" plurals and IRREGULAR forms, like morphy."""
+
+    def __init__(self, lemmas: dict):
+        self.lemmas = lemmas
+
+    def trie(self, lang):
+        return PrefixTrie(self.lemmas[lang])
+
+    def contains(self, word, lang):
+        word = word.lower()
+        lemmas = self.lemmas[lang]
+        if word in lemmas:
+            return True
+        if lang != "eng":
+            return False
+        return IRREGULAR.get(word) in lemmas or (word.endswith("s") and word[:-1] in lemmas)
+
+
+def recursive_splits(lexicon, text, lang, min_len=2):
+    """The recursive splitter `CompoundSplitter` replaced, checking every substring with `contains`."""
+    memo = {}
+
+    def _recursive_split(text):
+        if text in memo:
+            return memo[text]
+
+        valid_splits = []
+        if lexicon.contains(text, lang):
+            valid_splits.append([text])
+        for i in range(min_len, len(text) - min_len + 1):
+            prefix = text[:i]
+            suffix = text[i:]
+            if lexicon.contains(prefix, lang):
+                for s_split in _recursive_split(suffix):
+                    valid_splits.append([prefix] + s_split)
+
+        memo[text] = valid_splits
+        return valid_splits
+
+    return [s for s in _recursive_split(text) if len(s) >= 2]
+
+
+LEXICON = FakeLexicon({
+    "eng": {"sun", "flower", "flow", "er", "fire", "fly", "key", "board", "snow", "man", "goose", "a", "an"},
+    "tha": {"รถ", "ไฟ", "ฟ้า", "รถไฟ", "ไฟฟ้า", "น้ำ", "แข็ง", "น้ำแข็ง"},
+    "ind": {"mata", "hari", "matahari", "ha", "ri", "ma", "ta"},
+})
+
+WORDS = {
+    "eng": ["Sunflower", "firefly", "Keyboard", "snowman", "sunflowers", "fireflyer", "sunsun", "xyz", "a"],
+    "tha": ["รถไฟฟ้า", "น้ำแข็ง", "ไฟฟ้า", "รถน้ำ", "ฟ้ารถ"],
+    "ind": ["matahari", "harimata", "mataharimata"],
+}
+
+
+class CompoundSplitterTest(unittest.TestCase):
+    def setUp(self):
+        self.splitter = CompoundSplitter(LEXICON)
+
+    def test_lexicon_order_matches_recursive_splitter(self):
+        for lang, words in WORDS.items():
+            for word in words:
+                for min_len in (1, 2, 3):
+                    with self.subTest(word=word, min_len=min_len):
+                        self.assertEqual(
+                            list(self.splitter.iter_splits(word, lang, min_len=min_len)),
+                            recursive_splits(LEXICON, word, lang, min_len)
+                        )
+
+    def test_fewest_parts_is_a_reordering(self):
+        for lang, words in WORDS.items():
+            for word in words:
+                with self.subTest(word=word):
+                    splits = list(self.splitter.iter_splits(word, lang, rank="fewest_parts"))
+                    self.assertCountEqual(splits, recursive_splits(LEXICON, word, lang))
+                    self.assertEqual([len(s) for s in splits], sorted(len(s) for s in splits))
+
+    def test_irregular_english_forms_are_not_split(self):
+        # Only spans a lemma prefix plus a morphy suffix can reach are looked up, so
+        # irregular forms the recursive splitter found through morphy are missed
+        self.assertEqual(recursive_splits(LEXICON, "snowgeese", "eng"), [["snow", "geese"]])
+        self.assertEqual(list(self.splitter.iter_splits("snowgeese", "eng")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
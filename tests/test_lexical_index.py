@@ -0,0 +1,26 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.lexical_index import LexicalIndex, tokenize
+
+
+class TokenizeTest(unittest.TestCase):
+    def test_combining_marks_stay_in_their_word(self):
+        self.assertEqual(tokenize("โทรศัพท์มือถือ"), ["โทรศัพท์มือถือ"])
+        self.assertEqual(tokenize("मोबाइल फ़ोन"), ["मोबाइल", "फ़ोन"])
+
+    def test_case_and_plural_folding(self):
+        self.assertEqual(tokenize("Red Pizzas!"), ["red", "pizza"])
+
+    def test_no_fragment_matches(self):
+        index = LexicalIndex(["U+1F4F1"], ["mobile phone. A phone"], [{"tags": "โทรศัพท์มือถือ,phone"}])
+        self.assertEqual(index.exact("โทรศัพท์มือถือ"), [0])
+        # Before, both words shared the fragments "โทรศ" and "พท"
+        self.assertEqual(index.search("โทรศัพท์"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
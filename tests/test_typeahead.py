@@ -0,0 +1,44 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.typeahead import SCAN_LIMIT, Typeahead, typeahead_key
+
+IDS = ["U+1F436", "U+1F9CA"]
+DOCUMENTS = ["dog face. A friendly dog", "ice. A cube of ice"]
+METADATAS = [{"character": "🐶", "tags": "dog,หมา"}, {"character": "🧊", "tags": "ice,น้ำแข็ง"}]
+
+
+class TypeaheadTest(unittest.TestCase):
+    def setUp(self):
+        self.typeahead = Typeahead(IDS, DOCUMENTS, METADATAS)
+
+    def test_key_keeps_combining_marks(self):
+        self.assertEqual(typeahead_key("ตู้เย็น"), "ตู้เย็น")
+        self.assertEqual(typeahead_key("น้ำ แข็ง"), "น้ำ แข็ง")
+        self.assertEqual(typeahead_key("Dog-Face "), "dog face ")
+
+    def test_thai_popular_query(self):
+        self.typeahead.record_query("ตู้เย็น")
+        suggestions = self.typeahead.suggest("ตู")
+        self.assertEqual(suggestions, [{"text": "ตู้เย็น", "characters": [], "source": "popular"}])
+        self.assertEqual(self.typeahead.suggest("ต้"), [])
+
+    def test_thai_emoji_name(self):
+        session = self.typeahead.session()
+        session.update("น้")
+        self.assertEqual(session.update("น้ำ")[0]["characters"], ["🧊"])
+
+    def test_popular_ranked_over_whole_range(self):
+        for i in range(2 * SCAN_LIMIT):
+            self.typeahead.record_query(f"a{i:04d}")
+        for _ in range(5):
+            self.typeahead.record_query("azure")
+        suggestions = self.typeahead.suggest("a", n_suggestions=1)
+        self.assertEqual(suggestions[0]["text"], "azure")
+
+
+if __name__ == "__main__":
+    unittest.main()
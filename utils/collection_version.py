@@ -0,0 +1,124 @@
+import json
+import os
+import time
+
+
+def version_path(db_path: str, collection_name: str) -> str:
+    """Return the path of the version stamp file for a collection."""
+    return os.path.join(db_path, f"{collection_name}.version")
+
+
+def read_collection_stamp(db_path: str, collection_name: str) -> dict:
+    """
+    Read the stamp written when the collection was last (re)built.
+
+    The stamp holds the collection version and the name of the ChromaDB collection
+    currently serving `collection_name` (rebuilds write into a new collection and then
+    switch the stamp over). Returns version "0" and the logical name when unstamped.
+    """
+    stamp = {"version": "0", "collection": collection_name}
+    try:
+        with open(version_path(db_path, collection_name), encoding="utf-8") as f:
+            content = f.read().strip()
+    except OSError:
+        return stamp
+
+    try:
+        stamp.update(json.loads(content))
+    except ValueError:
+        # Plain-text stamp: version only
+        stamp["version"] = content or "0"
+    return stamp
+
+
+def read_collection_version(db_path: str, collection_name: str) -> str:
+    """
+    Read the version stamp written when the collection was last (re)built.
+
+    Returns "0" when the collection has never been stamped.
+    """
+    return read_collection_stamp(db_path, collection_name)["version"]
+
+
+def read_active_collection(db_path: str, collection_name: str) -> str:
+    """Return the ChromaDB collection currently serving `collection_name`."""
+    return read_collection_stamp(db_path, collection_name)["collection"]
+
+
+def new_collection_version() -> str:
+    """A fresh version stamp, for exports that must record it before it is written."""
+    return str(time.time_ns())
+
+
+def bump_collection_version(db_path: str, collection_name: str, active_collection: str | None = None,
+                            version: str | None = None, index_path: str | None = None) -> str:
+    """
+    Write a new version stamp for a collection. Call this after every rebuild so that
+    caches keyed on the version are invalidated.
+
+    Args:
+        db_path (str): ChromaDB directory.
+        collection_name (str): Logical collection name used by the searchers.
+        active_collection (str | None): ChromaDB collection that now serves it. Defaults to
+            the currently active one, so in-place updates keep pointing at the same collection.
+        version (str | None): Stamp to write (from `new_collection_version`). Defaults to a new one.
+        index_path (str | None): Index directory exported from this version, recorded in
+            the stamp. Export before bumping, so searchers reloading on the new version
+            find the matching index already in place.
+
+    Returns:
+        str: The new version stamp.
+    """
+    if active_collection is None:
+        active_collection = read_active_collection(db_path, collection_name)
+
+    version = version or new_collection_version()
+    stamp = {"version": version, "collection": active_collection}
+    if index_path:
+        stamp["index"] = index_path
+    path = version_path(db_path, collection_name)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(stamp, f)
+    # Atomic on POSIX, so readers never see a half written stamp and switching the
+    # active collection is a single step
+    os.replace(tmp_path, path)
+    return version
+
+
+class CollectionVersionWatcher:
+    """
+    Cheaply tracks a collection's version stamp by only re-reading the stamp file
+    when its modification time changes.
+    """
+
+    def __init__(self, db_path: str, collection_name: str):
+        self.path = version_path(db_path, collection_name)
+        self.db_path = db_path
+        self.collection_name = collection_name
+        self._mtime = None
+        stamp = read_collection_stamp(db_path, collection_name)
+        self.version = stamp["version"]
+        self.collection = stamp["collection"]
+
+    def check(self) -> bool:
+        """
+        Refresh the cached version.
+
+        Returns:
+            bool: True if the version changed since the last check.
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if mtime == self._mtime:
+            return False
+
+        self._mtime = mtime
+        stamp = read_collection_stamp(self.db_path, self.collection_name)
+        changed = stamp["version"] != self.version
+        self.version = stamp["version"]
+        self.collection = stamp["collection"]
+        return changed
@@ -0,0 +1,200 @@
+import heapq
+from bisect import bisect_left, bisect_right
+
+from utils.metrics import timed
+
+# Suffixes stripped by WordNet's morphy rules; an English span ending in one of these
+# may be an inflected form (e.g. "flowers") even though it is not a lemma itself.
+ENGLISH_INFLECTION_SUFFIXES = (
+    "s", "ses", "xes", "zes", "ches", "shes", "men", "ies", "es", "ed", "ing", "er", "est"
+)
+
+
+class PrefixTrie:
+    """
+    Read-only prefix trie over a sorted word array.
+
+    A trie node is the [lo, hi) range of words that share its prefix, so walking one
+    character deeper is two bisections inside the current range. This gives trie-style
+    early termination without allocating a node object per character of the lexicon.
+    """
+
+    def __init__(self, words):
+        self.words = sorted(words)
+
+    def walk(self, text: str, start: int = 0):
+        """
+        Walk the trie along `text` from `start`.
+
+        Yields:
+            tuple[int, bool]: (end, is_word) for every end such that `text[start:end]` is a
+                prefix of at least one word; `is_word` is True if it is a word itself.
+        """
+        words = self.words
+        lo, hi = 0, len(words)
+        for depth in range(len(text) - start):
+            char = text[start + depth]
+
+            def key(word, depth=depth):
+                return word[depth] if len(word) > depth else ""
+
+            lo = bisect_left(words, char, lo, hi, key=key)
+            hi = bisect_right(words, char, lo, hi, key=key)
+            if lo == hi:
+                return
+            # Within the range the word equal to the prefix itself sorts first
+            yield start + depth + 1, len(words[lo]) == depth + 1
+
+
+class CompoundSplitter:
+    """
+    Splits a word into dictionary words with a word lattice built in one pass.
+
+    For every start index the language's prefix trie is walked once, recording the
+    valid word spans. A backward pass then marks which positions can reach the end of
+    the text, so enumeration never explores a dead branch and splits can be produced
+    lazily, in lexicon order or ranked by fewest parts.
+
+    The splits are those of checking every substring with `lexicon.contains`, in the
+    same order, except for English forms that are not a lemma prefix plus one of
+    ENGLISH_INFLECTION_SUFFIXES: irregular forms morphy resolves through its exception
+    lists (e.g. "geese") are never looked up, so they are not found as parts.
+    """
+
+    def __init__(self, lexicon):
+        """
+        Args:
+            lexicon (WordNetLexicon): Provides `trie(lang)` and `contains(word, lang)`.
+        """
+        self.lexicon = lexicon
+
+    @staticmethod
+    def _lower(text: str) -> str:
+        """Lowercase without changing the length, so lattice indices map back to `text`."""
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            return lowered
+        return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+    @timed("split_lattice")
+    def lattice(self, text: str, lang: str, min_len: int = 2) -> list[list[int]]:
+        """
+        Build the word lattice of `text`.
+
+        Returns:
+            list[list[int]]: For each start index, the sorted end indices of dictionary
+                words of at least `min_len` characters beginning there.
+        """
+        trie = self.lexicon.trie(lang)
+        lowered = self._lower(text)
+        n = len(text)
+        edges = [[] for _ in range(n)]
+
+        for start in range(n):
+            ends = set()
+            deepest = start
+            for end, is_word in trie.walk(lowered, start):
+                deepest = end
+                if is_word and end - start >= min_len:
+                    ends.add(end)
+
+            if lang == 'eng':
+                # Inflected forms: a known stem prefix followed by a morphy suffix
+                for stem_end in range(start + 1, deepest + 1):
+                    for suffix in ENGLISH_INFLECTION_SUFFIXES:
+                        end = stem_end + len(suffix)
+                        if (end - start >= min_len and end not in ends
+                                and lowered.startswith(suffix, stem_end)
+                                and self.lexicon.contains(lowered[start:end], lang)):
+                            ends.add(end)
+
+            edges[start] = sorted(ends)
+
+        return edges
+
+    @staticmethod
+    def _min_parts(edges: list[list[int]], n: int) -> list[float]:
+        """Fewest words needed to cover text[i:] for every i (inf if impossible)."""
+        inf = float("inf")
+        best = [inf] * (n + 1)
+        best[n] = 0
+        for start in range(n - 1, -1, -1):
+            for end in edges[start]:
+                if best[end] + 1 < best[start]:
+                    best[start] = best[end] + 1
+        return best
+
+    def iter_splits(self, text: str, lang: str, min_len: int = 2, rank: str | None = None):
+        """
+        Lazily enumerate ways of splitting `text` into 2 or more dictionary words.
+
+        Args:
+            text (str): Word to split.
+            lang (str): ISO 639-3 language of the lexicon to use.
+            min_len (int): Minimum length of every part.
+            rank (str | None): None for lexicon order (the whole remainder first, then
+                shortest prefix first), or "fewest_parts" for splits with the fewest parts first.
+
+        Yields:
+            list[str]: Parts of one split, sliced from the original `text`.
+        """
+        n = len(text)
+        if n == 0:
+            return
+
+        edges = self.lattice(text, lang, min_len)
+        min_parts = self._min_parts(edges, n)
+        if min_parts[0] == float("inf"):
+            return
+
+        if rank == "fewest_parts":
+            yield from self._iter_fewest_parts(text, edges, min_parts)
+        elif rank is None:
+            yield from self._iter_lexicon_order(text, edges, min_parts)
+        else:
+            raise ValueError(f"Unknown split ranking: {rank}")
+
+    @staticmethod
+    def _iter_lexicon_order(text, edges, min_parts):
+        n = len(text)
+        # Depth-first over the lattice; each frame is (position, remaining ends to try)
+        path = []
+        stack = [(0, iter(sorted(edges[0], key=lambda end: (end != n, end))))]
+        while stack:
+            position, ends = stack[-1]
+            end = next((e for e in ends if min_parts[e] != float("inf")), None)
+            if end is None:
+                stack.pop()
+                if path:
+                    path.pop()
+                continue
+
+            path.append(end)
+            if end == n:
+                if len(path) >= 2:
+                    starts = [0] + path[:-1]
+                    yield [text[s:e] for s, e in zip(starts, path)]
+                path.pop()
+            else:
+                stack.append((end, iter(sorted(edges[end], key=lambda e: (e != n, e)))))
+
+    @staticmethod
+    def _iter_fewest_parts(text, edges, min_parts):
+        n = len(text)
+        # Best-first search; min_parts is an exact lower bound, so splits come out
+        # in non-decreasing number of parts.
+        counter = 0
+        heap = [(min_parts[0], counter, 0, ())]
+        while heap:
+            _, _, position, path = heapq.heappop(heap)
+            if position == n:
+                if len(path) >= 2:
+                    starts = (0,) + path[:-1]
+                    yield [text[s:e] for s, e in zip(starts, path)]
+                continue
+
+            for end in edges[position]:
+                if min_parts[end] == float("inf"):
+                    continue
+                counter += 1
+                heapq.heappush(heap, (len(path) + 1 + min_parts[end], counter, end, path + (end,)))
@@ -0,0 +1,244 @@
+import argparse
+import os
+import stat
+import struct
+import tempfile
+import threading
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+DEFAULT_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+# Upper bound on one request or response, so a peer cannot make us allocate without limit
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+_OK, _ERROR = b"o", b"e"
+_MODEL, _EMBED = b"m", b"q"
+
+
+def _private_dir(path: str) -> str:
+    """Create `path` with mode 0700, refusing a directory another user owns or can write to."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"'{path}' must be a directory owned by this user with mode 0700")
+    return path
+
+
+def default_socket_path() -> str:
+    """
+    Socket in a private per-user directory: $XDG_RUNTIME_DIR/emoji-search, else
+    <tmp>/emoji-search-<uid>. Other users can neither connect to it nor replace it.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        base = os.path.join(runtime_dir, "emoji-search")
+    else:
+        base = os.path.join(tempfile.gettempdir(), f"emoji-search-{os.getuid()}")
+    return os.path.join(base, "embedding.sock")
+
+
+def _authkey() -> bytes:
+    """
+    Shared secret for the connection handshake, from EMOJI_EMBEDDING_AUTHKEY or from the
+    file named by EMOJI_EMBEDDING_AUTHKEY_FILE (which must not be readable by others).
+    There is no default: a well-known key would let any local user impersonate the server.
+    """
+    key = os.environ.get("EMOJI_EMBEDDING_AUTHKEY")
+    key_file = os.environ.get("EMOJI_EMBEDDING_AUTHKEY_FILE")
+    if not key and key_file:
+        if os.stat(key_file).st_mode & 0o077:
+            raise PermissionError(f"Authkey file '{key_file}' must not be accessible by group or others (chmod 600)")
+        with open(key_file, encoding="utf-8") as f:
+            key = f.read().strip()
+    if not key:
+        raise RuntimeError("Set EMOJI_EMBEDDING_AUTHKEY or EMOJI_EMBEDDING_AUTHKEY_FILE to a secret shared "
+                           "by the embedding server and its clients")
+    return key.encode("utf-8")
+
+
+def encode_texts(texts: list[str]) -> bytes:
+    """Count, then each text as a length-prefixed UTF-8 string."""
+    encoded = [text.encode("utf-8") for text in texts]
+    return struct.pack("<I", len(encoded)) + b"".join(struct.pack("<I", len(t)) + t for t in encoded)
+
+
+def decode_texts(data: bytes) -> list[str]:
+    (count,), offset = struct.unpack_from("<I", data), 4
+    texts = []
+    for _ in range(count):
+        (length,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        if offset + length > len(data):
+            raise ValueError("Truncated text")
+        texts.append(data[offset:offset + length].decode("utf-8"))
+        offset += length
+    return texts
+
+
+def encode_matrix(matrix: np.ndarray) -> bytes:
+    """Shape, then the raw little-endian float32 values."""
+    matrix = np.ascontiguousarray(matrix, dtype="<f4")
+    return struct.pack("<II", *matrix.shape) + matrix.tobytes()
+
+
+def decode_matrix(data: bytes) -> np.ndarray:
+    rows, dim = struct.unpack_from("<II", data)
+    matrix = np.frombuffer(data, dtype="<f4", offset=8)
+    if matrix.size != rows * dim:
+        raise ValueError("Embedding payload does not match its shape")
+    return matrix.reshape(rows, dim)
+
+
+class EmbeddingServer:
+    """
+    Owns the single copy of the embedding model on a host and serves query embeddings
+    to other processes over a Unix socket.
+
+    Connections are authenticated with a shared secret (see `_authkey`) and carry plain
+    byte messages, never pickles. A message is one type byte plus its payload:
+        b"m"                  -> b"o" + model name (UTF-8)
+        b"q" + encode_texts   -> b"o" + encode_matrix (float32, one row per text)
+        any failure           -> b"e" + error message (UTF-8)
+    """
+
+    def __init__(self, model_name=DEFAULT_MODEL_NAME, socket_path=None, onnx_model_dir=None,
+                 onnx_quantized=False, onnx_threads=None):
+        self.model_name = model_name
+        self.socket_path = socket_path or default_socket_path()
+        self.authkey = _authkey()
+        if onnx_model_dir:
+            from utils.onnx_encoder import OnnxEmbeddingFunction
+
+            self.ef = OnnxEmbeddingFunction(onnx_model_dir, quantized=onnx_quantized, num_threads=onnx_threads)
+            if self.ef.model_name != model_name:
+                raise ValueError(f"ONNX model '{self.ef.model_name}' does not match '{model_name}'")
+        else:
+            from chromadb.utils import embedding_functions
+
+            self.ef = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=model_name)
+        # One forward pass at a time; concurrent clients queue here
+        self._lock = threading.Lock()
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        with self._lock:
+            return np.asarray(self.ef(list(texts)), dtype=np.float32)
+
+    def _handle(self, request: bytes) -> bytes:
+        kind, payload = request[:1], request[1:]
+        if kind == _MODEL:
+            return _OK + self.model_name.encode("utf-8")
+        if kind == _EMBED:
+            return _OK + encode_matrix(self.embed(decode_texts(payload)))
+        return _ERROR + f"Unknown request type: {kind!r}".encode("utf-8")
+
+    def _serve_connection(self, conn):
+        with conn:
+            while True:
+                try:
+                    request = conn.recv_bytes(MAX_MESSAGE_BYTES)
+                except (EOFError, OSError):
+                    return
+
+                try:
+                    response = self._handle(request)
+                except Exception as e:
+                    response = _ERROR + str(e).encode("utf-8")
+                try:
+                    conn.send_bytes(response)
+                except (EOFError, OSError):
+                    return
+
+    def serve_forever(self):
+        """Accept clients until interrupted, one thread per connection."""
+        _private_dir(os.path.dirname(os.path.abspath(self.socket_path)))
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        with Listener(self.socket_path, family="AF_UNIX", authkey=self.authkey) as listener:
+            os.chmod(self.socket_path, 0o600)
+            print(f"Serving {self.model_name} embeddings on {self.socket_path}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    # Includes clients failing the authentication handshake
+                    print(f"Error accepting connection: {e}")
+                    continue
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+
+class RemoteEmbeddingFunction:
+    """
+    Embedding function that forwards texts to an `EmbeddingServer` instead of loading
+    the model in this process. Safe to share between threads (one connection each).
+    """
+
+    def __init__(self, socket_path=None, model_name=None):
+        """
+        Args:
+            socket_path (str | None): Unix socket of the embedding server (default:
+                `default_socket_path()`). Its directory must be private to this user.
+            model_name (str | None): If given, fail unless the server runs this model, so
+                query vectors always match the collection being searched.
+        """
+        self.socket_path = socket_path or default_socket_path()
+        # A socket in a directory other users can write to could be swapped for theirs
+        _private_dir(os.path.dirname(os.path.abspath(self.socket_path)))
+        self.authkey = _authkey()
+        self._local = threading.local()
+
+        served_model = self._request(_MODEL).decode("utf-8")
+        if model_name and served_model != model_name:
+            raise ValueError(
+                f"Embedding server at {self.socket_path} runs '{served_model}', expected '{model_name}'"
+            )
+        self.model_name = served_model
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # The handshake is mutual: the server must prove it knows the key too
+            conn = Client(self.socket_path, family="AF_UNIX", authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _request(self, kind: bytes, payload: bytes = b"") -> bytes:
+        # Retry once on a fresh connection in case the server was restarted
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send_bytes(kind + payload)
+                response = conn.recv_bytes(MAX_MESSAGE_BYTES)
+                break
+            except (EOFError, OSError):
+                self._local.conn = None
+                if attempt:
+                    raise
+
+        if response[:1] != _OK:
+            raise RuntimeError(f"Embedding server error: {response[1:].decode('utf-8', 'replace')}")
+        return response[1:]
+
+    def __call__(self, input: list[str]) -> list[np.ndarray]:
+        return list(decode_matrix(self._request(_EMBED, encode_texts(list(input)))))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve query embeddings to local worker processes.")
+    parser.add_argument("--socket", default=None,
+                        help="Unix socket path to listen on (default: a private per-user runtime directory).")
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME, help="SentenceTransformer model to serve.")
+    parser.add_argument("--onnx-model-dir", help="Serve the ONNX export in this directory instead of torch.")
+    parser.add_argument("--onnx-quantized", action="store_true", help="Use the int8 ONNX model.")
+    parser.add_argument("--onnx-threads", type=int, default=None, help="onnxruntime intra-op threads.")
+    args = parser.parse_args()
+
+    EmbeddingServer(
+        model_name=args.model,
+        socket_path=args.socket,
+        onnx_model_dir=args.onnx_model_dir,
+        onnx_quantized=args.onnx_quantized,
+        onnx_threads=args.onnx_threads
+    ).serve_forever()
@@ -0,0 +1,201 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+# On-disk layout of an exported emoji index directory:
+#
+#   header.json                  counts, dtype, dimension, distance space, collection version
+#   embeddings.bin               row-major (count, dim) matrix of float32 or float16
+#   <table>.offsets / <table>.blob
+#                                string table: int64 offsets (count + 1) into a UTF-8 blob,
+#                                for ids, documents, and the character/unicode/tags metadata
+#
+# Every file is opened with numpy.memmap, so worker processes on the same host share the
+# page cache instead of each holding a private copy of the index.
+#
+# Mapped files must never change under a reader, so an export is written into a new
+# sibling directory (<name>.<timestamp>) and the index path is a symlink switched over to
+# it in one atomic replace. The previous generation is kept for workers still mapping it.
+
+FORMAT_VERSION = 1
+HEADER_FILE = "header.json"
+EMBEDDINGS_FILE = "embeddings.bin"
+STRING_TABLES = ("ids", "documents", "character", "unicode", "tags")
+METADATA_FIELDS = ("character", "unicode", "tags")
+SUPPORTED_DTYPES = ("float32", "float16")
+
+
+def _write_string_table(path_prefix: str, values):
+    """Write `values` as an offsets file plus a concatenated UTF-8 blob."""
+    encoded = [str(v).encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    offsets.tofile(f"{path_prefix}.offsets")
+    with open(f"{path_prefix}.blob", "wb") as f:
+        f.write(b"".join(encoded))
+
+
+def write_index_file(path, ids, embeddings, documents, metadatas, space="l2",
+                     dtype="float32", collection_name=None, collection_version=None) -> str:
+    """
+    Export an emoji index to `path` (a directory) in the memory-mappable format above.
+
+    The files are written into a fresh directory next to `path`, which then becomes a
+    symlink to it, so readers only ever see the old index or the complete new one.
+
+    Args:
+        path (str): Index path. An existing index there is replaced, not modified.
+        ids (list[str]): Emoji ids.
+        embeddings (array-like): Embedding matrix, shape (count, dim).
+        documents (list[str]): Document text per id.
+        metadatas (list[dict]): Metadata per id (character, unicode, tags).
+        space (str): Distance function of the source collection.
+        dtype (str): "float32" or "float16" storage for the embedding matrix.
+        collection_name (str | None): Source collection, recorded in the header.
+        collection_version (str | None): Source collection version stamp, recorded in the header.
+
+    Returns:
+        str: The directory the index was written to (what `path` now points at).
+    """
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+
+    path = os.path.abspath(path)
+    parent, name = os.path.split(path)
+    os.makedirs(parent, exist_ok=True)
+    build_dir = tempfile.mkdtemp(prefix=f".{name}.", dir=parent)
+    try:
+        matrix = np.ascontiguousarray(embeddings, dtype=dtype)
+        matrix.tofile(os.path.join(build_dir, EMBEDDINGS_FILE))
+
+        _write_string_table(os.path.join(build_dir, "ids"), ids)
+        _write_string_table(os.path.join(build_dir, "documents"), documents)
+        for field in METADATA_FIELDS:
+            _write_string_table(os.path.join(build_dir, field), [m.get(field, "") for m in metadatas])
+
+        header = {
+            "format_version": FORMAT_VERSION,
+            "count": int(matrix.shape[0]),
+            "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+            "dtype": dtype,
+            "space": space,
+            "collection_name": collection_name,
+            "collection_version": collection_version,
+        }
+        with open(os.path.join(build_dir, HEADER_FILE), "w", encoding="utf-8") as f:
+            json.dump(header, f, indent=2)
+        os.chmod(build_dir, 0o755)
+
+        index_dir = f"{path}.{time.time_ns()}"
+        os.rename(build_dir, index_dir)
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+
+    _switch_index(path, index_dir)
+    return index_dir
+
+
+def _switch_index(path: str, index_dir: str):
+    """Point the symlink `path` at `index_dir` atomically and drop generations older than the previous one."""
+    previous = os.path.realpath(path) if os.path.exists(path) else None
+    if os.path.isdir(path) and not os.path.islink(path):
+        # Index exported before indexes were symlinked: move it aside once. Open memory
+        # maps are unaffected, but the path is briefly missing for new readers.
+        os.rename(path, f"{path}.0")
+        previous = os.path.realpath(f"{path}.0")
+
+    link = f"{index_dir}.link"
+    os.symlink(os.path.basename(index_dir), link)
+    os.replace(link, path)
+
+    parent, name = os.path.split(path)
+    for entry in os.listdir(parent):
+        stale = os.path.join(parent, entry)
+        generation = entry[len(name) + 1:]
+        if (entry.startswith(f"{name}.") and generation.isdigit()
+                and os.path.realpath(stale) not in (os.path.realpath(index_dir), previous)):
+            # Workers mapping an older generation keep their pages until they unmap
+            shutil.rmtree(stale, ignore_errors=True)
+
+
+class StringTable:
+    """Read-only sequence of strings backed by a memory-mapped offsets file and blob."""
+
+    def __init__(self, path_prefix: str, count: int):
+        self.offsets = np.memmap(f"{path_prefix}.offsets", dtype=np.int64, mode="r", shape=(count + 1,))
+        blob_size = int(self.offsets[-1])
+        # numpy cannot map an empty file
+        self.blob = np.memmap(f"{path_prefix}.blob", dtype=np.uint8, mode="r") if blob_size else b""
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return bytes(self.blob[start:end]).decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class MetadataTable:
+    """Read-only sequence of metadata dicts assembled on access from packed string tables."""
+
+    def __init__(self, tables: dict):
+        self.tables = tables
+
+    def __len__(self):
+        return len(next(iter(self.tables.values())))
+
+    def __getitem__(self, i: int) -> dict:
+        return {field: table[i] for field, table in self.tables.items()}
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class EmojiIndexFile:
+    """
+    Zero-copy reader for an index directory written by `write_index_file`.
+    """
+
+    def __init__(self, path: str):
+        # Resolve the symlink once, so every file comes from the same export even if a
+        # new one is switched in while we open them
+        path = os.path.realpath(path)
+        with open(os.path.join(path, HEADER_FILE), encoding="utf-8") as f:
+            self.header = json.load(f)
+
+        if self.header.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported index format version: {self.header.get('format_version')}")
+
+        self.path = path
+        self.count = self.header["count"]
+        self.dim = self.header["dim"]
+        self.space = self.header["space"]
+        self.collection_version = self.header.get("collection_version")
+
+        self.embeddings = np.memmap(
+            os.path.join(path, EMBEDDINGS_FILE),
+            dtype=self.header["dtype"],
+            mode="r",
+            shape=(self.count, self.dim)
+        )
+        self.ids = StringTable(os.path.join(path, "ids"), self.count)
+        self.documents = StringTable(os.path.join(path, "documents"), self.count)
+        self.metadatas = MetadataTable({
+            field: StringTable(os.path.join(path, field), self.count)
+            for field in METADATA_FIELDS
+        })
+
+
+def is_index_file(path: str) -> bool:
+    """Return True if `path` is a directory containing an exported emoji index."""
+    return os.path.isfile(os.path.join(path, HEADER_FILE))
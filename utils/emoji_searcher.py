@@ -1,36 +1,414 @@
-import chromadb
-from chromadb.utils import embedding_functions
+import gc
 import os
+import threading
+import unicodedata
+
+import numpy as np
+
+from utils.collection_version import CollectionVersionWatcher
+from utils.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from utils.lru_cache import LRUCache
+from utils.metrics import span, timed
+from utils.numpy_index import NumpyIndex
+from utils.onnx_encoder import default_model_dir
+from utils.results import EmojiTable, SearchResults
+from utils.typeahead import Typeahead
+
+# Embedding model each collection was built with; queries must use the same model
+COLLECTION_MODELS = {
+    "LLM-generated-emoji-multilingual-MiniLM-L12-v2": "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+    "LLM-generated-emoji-multilingual-e5-base": "intfloat/multilingual-e5-base",
+}
+
+# Short names accepted wherever a collection is picked per request or per route
+COLLECTION_ALIASES = {
+    "minilm": "LLM-generated-emoji-multilingual-MiniLM-L12-v2",
+    "e5": "LLM-generated-emoji-multilingual-e5-base",
+}
+
+# Approximate parameter counts, used to estimate the memory a loaded model takes
+MODEL_PARAMETERS = {
+    "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2": 118_000_000,
+    "intfloat/multilingual-e5-base": 278_000_000,
+}
+
+EMBEDDING_BACKENDS = ("torch", "onnx")
+
+RETRIEVAL_MODES = ("semantic", "hybrid", "lexical_first")
+
+# Candidates taken from each ranking before reciprocal rank fusion
+FUSION_DEPTH = 30
+
+
+def resolve_collection(name: str) -> str:
+    """Return the collection for a full collection name or an alias in COLLECTION_ALIASES."""
+    name = COLLECTION_ALIASES.get(name, name)
+    if name not in COLLECTION_MODELS:
+        raise ValueError(f"Unknown collection '{name}', expected one of {list(COLLECTION_MODELS)} "
+                         f"or an alias in {list(COLLECTION_ALIASES)}")
+    return name
+
+
+def _estimate_results_size(results: SearchResults) -> int:
+    """Rough size in bytes of a cached result, used for the result cache memory cap."""
+    # Object headers plus the row / distance arrays; documents and metadata live in
+    # the shared EmojiTable and are not counted per entry
+    return 256 + results.nbytes
+
+
+# Process-wide cache of search results, shared by every EmojiSearcher (and therefore
+# every Streamlit session). Keys include the collection version stamp, so a rebuild by
+# src/crete_data.py invalidates all previous entries.
+RESULT_CACHE = LRUCache(max_size=20000, max_bytes=64 * 1024 * 1024, sizeof=_estimate_results_size)
+
+
+class SearchState:
+    """
+    Everything one search reads, opened from one collection version. Never modified:
+    a rebuild produces a new state that replaces the old one in a single assignment, so
+    a search that took a state sees the index, table and lexical index of one version.
+    """
+
+    __slots__ = ("version", "collection", "index", "table", "lexical_index")
+
+    def __init__(self, version, collection, index, table, lexical_index):
+        self.version = version
+        self.collection = collection
+        self.index = index
+        self.table = table
+        self.lexical_index = lexical_index
+
 
 class EmojiSearcher:
-    def __init__(self, db_path="chroma_db", collection_name="LLM-generated-emoji-multilingual-MiniLM-L12-v2"):
+    def __init__(self, db_path="chroma_db", collection_name="LLM-generated-emoji-multilingual-MiniLM-L12-v2",
+                 embedding_cache_size=4096, embedding_cache_ttl=None, use_result_cache=True,
+                 backend="chroma", index_path=None, quantization=None, rerank=0,
+                 embedding_socket=None, embedding_backend="torch", onnx_model_dir=None,
+                 onnx_quantized=False, onnx_threads=None, retrieval="semantic", lazy=False):
         """
         Initialize the EmojiSearcher with ChromaDB client and embedding function.
+
+        ChromaDB, torch / onnxruntime and the model are imported and loaded by `load`,
+        which runs here unless `lazy` is set; a lazy searcher loads on first use or
+        from a warm-up thread (see utils.warm_up), and sets `ready` once loaded.
+
+        Args:
+            db_path (str): ChromaDB directory, relative to the CWD.
+            collection_name (str): Emoji collection to search (or its alias in COLLECTION_ALIASES).
+            embedding_cache_size (int): Max number of query embeddings kept in memory (0 disables).
+            embedding_cache_ttl (float | None): Seconds a cached query embedding stays valid.
+            use_result_cache (bool): Serve repeated queries from the process-wide RESULT_CACHE.
+            backend (str): "chroma" queries the ChromaDB HNSW index, "numpy" loads every
+                embedding into memory and answers with an exact brute-force search.
+            index_path (str | None): With the "numpy" backend, load the index from a
+                memory-mapped index directory exported by src/crete_data.py (or an `.npz`
+                from `NumpyIndex.save`) instead of from the collection.
+            quantization (str | None): With the "numpy" backend, score with "float16" or
+                "int8" embeddings instead of float32.
+            rerank (int): With quantization, re-rank this many candidates exactly. The exact
+                vectors are read from the memory-mapped export, so this needs `index_path`.
+            embedding_socket (str | None): Unix socket of a `utils.embedding_service`
+                server. Queries are embedded there instead of loading the model in this process.
+            embedding_backend (str): "torch" runs the SentenceTransformer model, "onnx" runs
+                its ONNX export with onnxruntime (see `python -m utils.onnx_encoder export`).
+            onnx_model_dir (str | None): ONNX export directory (default: onnx_models/<model>).
+            onnx_quantized (bool): Use the int8 dynamically quantized ONNX model.
+            onnx_threads (int | None): onnxruntime intra-op thread count.
+            retrieval (str): "semantic" ranks by embedding distance only. "hybrid" also
+                keeps a BM25 index over tags and short descriptions: exact tag/description
+                matches come first and the rest is fused with the vector ranking by
+                reciprocal rank fusion. "lexical_first" additionally skips the embedding
+                model when the lexical match is confident (an exact match, or a top hit
+                containing every query term).
+            lazy (bool): Defer loading the model and the index to `load`.
         """
+        if backend not in ("chroma", "numpy"):
+            raise ValueError(f"Unknown search backend: {backend}")
+        if embedding_backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {embedding_backend}")
+        if retrieval not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {retrieval}")
+        if backend == "numpy" and quantization and rerank and not index_path:
+            raise ValueError("rerank needs index_path: the exact vectors are read from the exported index")
+        collection_name = resolve_collection(collection_name)
+
         # Ensure we point to the correct DB path relative to CWD
         abs_db_path = os.path.join(os.getcwd(), db_path)
-        self.client = chromadb.PersistentClient(path=abs_db_path)
+        self.db_path = abs_db_path
+        self.collection_name = collection_name
+        self.use_result_cache = use_result_cache
+        self.backend = backend
+        self.index_path = index_path
+        self.quantization = quantization
+        self.rerank = rerank
+        self.retrieval = retrieval
+        self.version_watcher = CollectionVersionWatcher(abs_db_path, collection_name)
 
         # Use the same embedding model as in creation
-        if collection_name == "LLM-generated-emoji-multilingual-MiniLM-L12-v2":
-            model_name = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-        elif collection_name == "LLM-generated-emoji-multilingual-e5-base":
-            model_name = "intfloat/multilingual-e5-base"
-        
-        self.ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=model_name
-        )
-        
+        self.model_name = COLLECTION_MODELS[collection_name]
+        self.embedding_socket = embedding_socket
+        self.onnx_model_dir = onnx_model_dir or default_model_dir(self.model_name)
+        self.onnx_quantized = onnx_quantized
+        self.onnx_threads = onnx_threads
+        if embedding_socket:
+            self.embedding_backend = "remote"
+        elif embedding_backend == "onnx":
+            self.embedding_backend = "onnx-int8" if onnx_quantized else "onnx"
+        else:
+            self.embedding_backend = "torch"
+        self.embedding_cache = LRUCache(max_size=embedding_cache_size, ttl=embedding_cache_ttl)
+
+        self.client = None
+        self.ef = None
+        self._state = None
+        self._refresh_lock = threading.Lock()
+        self._typeahead = None
+        self._typeahead_state = None
+        self._popular_queries = None
+        self._typeahead_lock = threading.Lock()
+
+        # Set once `load` has finished; read by the UI and health checks
+        self.ready = threading.Event()
+        self.load_error = None
+        self._load_lock = threading.Lock()
+        if not lazy:
+            self.load()
+
+    def load(self):
+        """
+        Import and create the ChromaDB client and the embedding function, then open the
+        collection and index. Idempotent and thread-safe; concurrent callers wait for the
+        first one. Errors are kept in `load_error` and re-raised.
+        """
+        if self.ready.is_set():
+            return
+
+        with self._load_lock:
+            if self.ready.is_set():
+                return
+            try:
+                # A numpy backend reading an exported index never touches ChromaDB
+                if not (self.backend == "numpy" and self.index_path):
+                    import chromadb
+
+                    self.client = chromadb.PersistentClient(path=self.db_path)
+                self.ef = self._create_embedding_function()
+
+                with self._refresh_lock:
+                    self.version_watcher.check()
+                    self._state = self._open_state()
+            except Exception as e:
+                self.load_error = e
+                raise
+            self.load_error = None
+            self.ready.set()
+
+    def unload(self):
+        """
+        Drop the model, index and tables so their memory can be reclaimed (used by
+        utils.searcher_router to stay within its memory budget). The next search loads
+        them again. Popular typeahead queries and the embedding cache are kept.
+        """
+        with self._load_lock:
+            if not self.ready.is_set():
+                return
+            self.ready.clear()
+            if self.embedding_backend == "torch":
+                # chromadb keeps loaded SentenceTransformer models in a class-level dict
+                getattr(type(self.ef), "models", {}).pop(self.model_name, None)
+            with self._typeahead_lock:
+                if self._typeahead is not None:
+                    self._popular_queries = self._typeahead.popular
+                    self._typeahead = self._typeahead_state = None
+            with self._refresh_lock:
+                self._state = None
+            self.client = self.ef = None
+        gc.collect()
+
+    # The current state's parts, for callers outside the search path. A search reads
+    # them through one `_refresh_collection` snapshot instead, so they match.
+
+    @property
+    def collection(self):
+        return self._state.collection if self._state else None
+
+    @property
+    def index(self):
+        return self._state.index if self._state else None
+
+    @property
+    def table(self) -> EmojiTable | None:
+        return self._state.table if self._state else None
+
+    @property
+    def lexical_index(self) -> LexicalIndex | None:
+        return self._state.lexical_index if self._state else None
+
+    def memory_bytes(self) -> int:
+        """
+        Rough memory taken by this searcher once loaded: the model's weights (none for a
+        remote embedding server) plus the vectors of an in-memory index.
+        """
+        bytes_per_parameter = {"torch": 4, "onnx": 4, "onnx-int8": 1, "remote": 0}[self.embedding_backend]
+        size = MODEL_PARAMETERS.get(self.model_name, 0) * bytes_per_parameter
+        index = self.index
+        if isinstance(index, NumpyIndex):
+            size += index.memory_bytes()
+        return size
+
+    def _create_embedding_function(self):
+        """Create the query embedding function for `embedding_backend`."""
+        if self.embedding_backend == "remote":
+            from utils.embedding_service import RemoteEmbeddingFunction
+
+            # Share one model per host: the embedding server owns it
+            return RemoteEmbeddingFunction(self.embedding_socket, model_name=self.model_name)
+
+        if self.embedding_backend.startswith("onnx"):
+            from utils.onnx_encoder import OnnxEmbeddingFunction
+
+            ef = OnnxEmbeddingFunction(self.onnx_model_dir, quantized=self.onnx_quantized, num_threads=self.onnx_threads)
+            if ef.model_name != self.model_name:
+                raise ValueError(f"ONNX model '{ef.model_name}' does not match collection model '{self.model_name}'")
+            return ef
+
+        from chromadb.utils import embedding_functions
+
+        return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=self.model_name)
+
+    def warm_up(self, query: str = "dog"):
+        """Load everything and run one throwaway query so the first real query is fast."""
+        self.load()
+        self.search_many([query], n_results=1)
+
+    def _open_collection(self):
+        """Open the ChromaDB collection, returning None if it is not available."""
+        if self.client is None:
+            return None
+
         try:
-            self.collection = self.client.get_collection(
-                name=collection_name,
-                embedding_function=self.ef
+            # The stamp names the collection currently serving our name, since rebuilds
+            # switch to a freshly built one (see src/crete_data.py). Queries are always
+            # embedded by `embed`, so remote and ONNX embedding functions do not need to
+            # be registered with the collection.
+            return self.client.get_collection(
+                name=self.version_watcher.collection,
+                embedding_function=self.ef if self.embedding_backend == "torch" else None
             )
         except Exception as e:
-            print(f"Error accessing collection '{collection_name}': {e}")
-            self.collection = None
+            print(f"Error accessing collection '{self.collection_name}': {e}")
+            return None
+
+    def _open_state(self) -> SearchState:
+        """Open the collection and build everything searched from it, for the watcher's current version."""
+        version = self.version_watcher.version
+        collection = self._open_collection()
+        index = self._open_index(collection)
+        table = self._open_table(collection, index)
+        return SearchState(version, collection, index, table, self._open_lexical_index(table))
+
+    def _open_index(self, collection):
+        """
+        Return the object queried by `search_many`: the collection itself, or a
+        NumpyIndex for the "numpy" backend. Both expose `query(query_embeddings, n_results)`.
+        """
+        if self.backend == "chroma":
+            return collection
+
+        try:
+            if self.index_path:
+                index = NumpyIndex.load(self.index_path, quantization=self.quantization, rerank=self.rerank)
+                stamp = getattr(index, "collection_version", None)
+                if stamp is not None and stamp != self.version_watcher.version:
+                    print(f"Warning: index at '{self.index_path}' was exported from collection "
+                          f"version {stamp}, current version is {self.version_watcher.version}.")
+                return index
+            if collection is not None:
+                return NumpyIndex.from_collection(
+                    collection, quantization=self.quantization, rerank=self.rerank
+                )
+        except Exception as e:
+            print(f"Error loading in-memory index: {e}")
+        return None
+
+    def _open_table(self, collection, index, batch_size=5000):
+        """
+        Build the shared id / document / metadata table results point into. The numpy
+        backend's tables are reused as they are; with ChromaDB everything is fetched
+        once here, so queries only return ids and distances. None if nothing is loaded.
+        """
+        if isinstance(index, NumpyIndex):
+            return EmojiTable(index.ids, index.documents, index.metadatas)
+        if collection is None:
+            return None
+
+        try:
+            ids, documents, metadatas = [], [], []
+            for offset in range(0, collection.count(), batch_size):
+                batch = collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+                ids.extend(batch["ids"])
+                documents.extend(batch["documents"])
+                metadatas.extend(batch["metadatas"])
+            return EmojiTable.intern(ids, documents, metadatas)
+        except Exception as e:
+            print(f"Error loading emoji table: {e}")
+        return None
+
+    def _open_lexical_index(self, table):
+        """Build the BM25 index for the hybrid retrieval modes (None for "semantic")."""
+        if self.retrieval == "semantic" or table is None:
+            return None
+
+        try:
+            return LexicalIndex(table.ids, table.documents, table.metadatas)
+        except Exception as e:
+            print(f"Error building lexical index: {e}")
+        return None
 
-    def search(self, query: str, n_results: int = 10) -> list[dict]:
+    def typeahead(self) -> Typeahead | None:
+        """
+        Prefix index for as-you-type suggestions, built on first use and rebuilt after
+        the collection changes (popular query counts are kept).
+        """
+        state = self._refresh_collection()
+        with self._typeahead_lock:
+            if self._typeahead_state is not state:
+                if self._typeahead is not None:
+                    self._popular_queries = self._typeahead.popular
+                self._typeahead = self._typeahead_state = None
+                if state is None or state.table is None:
+                    return None
+                table = state.table
+                self._typeahead = Typeahead(table.ids, table.documents, table.metadatas,
+                                            popular=self._popular_queries)
+                self._typeahead_state = state
+            return self._typeahead
+
+    def _refresh_collection(self) -> SearchState | None:
+        """
+        Return the current state, first reopening the collection if src/crete_data.py
+        rebuilt it since we last looked.
+
+        One thread rebuilds while the others keep searching the previous state, which is
+        then replaced in a single assignment.
+        """
+        self.load()
+        if not self._refresh_lock.acquire(blocking=False):
+            return self._state
+        try:
+            if self.ready.is_set() and self.version_watcher.check():
+                print(f"Collection '{self.collection_name}' was rebuilt, reopening.")
+                self._state = self._open_state()
+            return self._state
+        finally:
+            self._refresh_lock.release()
+
+    def collection_version(self) -> str:
+        """Version stamp of the collection currently searched (after picking up rebuilds)."""
+        state = self._refresh_collection()
+        return state.version if state else self.version_watcher.version
+
+    def search(self, query: str, n_results: int = 10) -> SearchResults:
         """
         Search for emojis based on the query.
         
@@ -39,36 +417,200 @@ class EmojiSearcher:
             n_results (int): Number of top results to return.
         
         Returns:
-            list[dict]: A list of dictionaries containing result details.
+            SearchResults: The hits, nearest first. Each hit reads like the former
+                result dicts (`hit["id"]`, `hit["distance"]`, `hit["document"]`,
+                `hit["metadata"]`); use `to_dicts()` for plain dicts, e.g. for JSON.
         """
-        if not self.collection:
+        output = self.search_many([query], n_results=n_results).get(query, [])
+        if not output:
+            print("No results found.")
+        return output
+
+    @timed("search_many")
+    def search_many(self, queries: list[str], n_results: int = 10) -> dict[str, SearchResults]:
+        """
+        Search for emojis for several queries with a single embedding batch and a single
+        ChromaDB query.
+
+        Duplicate queries are only embedded and searched once, and queries found in the
+        process-wide result cache are not embedded or searched at all. Cached results are
+        shared, so treat them as read-only.
+
+        Args:
+            queries (list[str]): The search texts.
+            n_results (int): Number of top results to return per query.
+
+        Returns:
+            dict[str, SearchResults]: Results (as returned by `search`) keyed by query.
+        """
+        # Everything below reads this one snapshot, even if a rebuild swaps in a new one
+        state = self._refresh_collection()
+        if state is None or not state.index or state.table is None:
             print("Collection not loaded.")
-            return []
+            return {}
 
-        # Perform the query
-        results = self.collection.query(
-            query_texts=[query],
-            n_results=n_results
-        )
+        unique_queries = list(dict.fromkeys(queries))
+        if not unique_queries:
+            return {}
+
+        output = {}
+        pending = []
+        for query in unique_queries:
+            cached = RESULT_CACHE.get(self._result_key(state, query, n_results)) if self.use_result_cache else None
+            if cached is not None:
+                output[query] = cached
+            else:
+                pending.append(query)
+
+        # Queries answered by the lexical index never reach the embedding model
+        lexical = {}
+        semantic_queries = pending
+        if state.lexical_index is not None:
+            semantic_queries = []
+            for query in pending:
+                with span("lexical_match"):
+                    lexical[query] = self._lexical_match(state.lexical_index, query, n_results)
+                if lexical[query][2]:
+                    output[query] = self._lexical_results(state.table, *lexical[query][:2], n_results)
+                else:
+                    semantic_queries.append(query)
+
+        if semantic_queries:
+            # Embed every query in one forward pass, then query the index once
+            embeddings = self.embed(semantic_queries)
+            with span("vector_query"):
+                rows, distances = self._query_rows(
+                    state, embeddings, max(n_results, FUSION_DEPTH) if lexical else n_results
+                )
+
+            for i, query in enumerate(semantic_queries):
+                output[query] = SearchResults(state.table, rows[i], distances[i])
+                if query in lexical:
+                    exact_rows, hits, _ = lexical[query]
+                    output[query] = self._fuse(state.table, exact_rows, hits, output[query], n_results)
+
+        if self.use_result_cache:
+            for query in pending:
+                RESULT_CACHE.put(self._result_key(state, query, n_results), output[query])
+
+        return {query: output[query] for query in unique_queries}
+
+    def _lexical_match(self, lexical_index: LexicalIndex, query: str,
+                       n_results: int) -> tuple[list[int], list[tuple[int, float]], bool]:
+        """
+        Look the query up in the lexical index.
+
+        Returns:
+            tuple: Exact-match rows, BM25 (row, score) hits, and whether the lexical
+                results alone are good enough to skip the embedding model.
+        """
+        exact_rows = lexical_index.exact(query)
+        hits = lexical_index.search(query, max(n_results, FUSION_DEPTH))
+
+        confident = len(exact_rows) >= n_results
+        if self.retrieval == "lexical_first" and not confident:
+            confident = bool(exact_rows) or bool(hits and lexical_index.coverage(query, hits[0][0]) == 1.0)
+        return exact_rows, hits, confident
+
+    def _query_rows(self, state: SearchState, embeddings, n_results: int) -> tuple[list, list]:
+        """
+        Query the state's index for rows of its table.
+
+        Returns:
+            tuple[list[np.ndarray], list[np.ndarray]]: Rows and distances for each query.
+        """
+        if isinstance(state.index, NumpyIndex):
+            return state.index.search(embeddings, n_results)
+
+        # Documents and metadata come from the table, so ChromaDB only returns ids
+        results = state.index.query(query_embeddings=embeddings, n_results=n_results, include=["distances"])
+        rows, distances = [], []
+        for query_ids, query_distances in zip(results["ids"], results["distances"]):
+            query_rows = state.table.rows(query_ids)
+            found = query_rows >= 0
+            rows.append(query_rows[found])
+            distances.append(np.asarray(query_distances, dtype=np.float32)[found])
+        return rows, distances
+
+    def _lexical_results(self, table: EmojiTable, exact_rows: list[int], hits: list[tuple[int, float]],
+                         n_results: int) -> SearchResults:
+        """
+        Results from the lexical index alone. Exact matches get distance 0, BM25 hits
+        1 - score / best score, so the UI's "1 - distance" match score stays in [0, 1].
+        """
+        rows = exact_rows[:n_results]
+        distances = [0.0] * len(rows)
+        best = hits[0][1] if hits else 1.0
+        exact = set(exact_rows)
+        for row, score in hits:
+            if len(rows) >= n_results:
+                break
+            if row not in exact:
+                rows.append(row)
+                distances.append(1.0 - score / best)
+        return SearchResults(table, rows, distances)
+
+    def _fuse(self, table: EmojiTable, exact_rows: list[int], hits: list[tuple[int, float]], semantic: SearchResults,
+              n_results: int) -> SearchResults:
+        """
+        Exact lexical matches first, then BM25 and vector rankings fused by reciprocal rank.
+        Emojis found by the vector search keep their vector distance.
+        """
+        semantic_rows = semantic.rows.tolist()
+        best = hits[0][1] if hits else 1.0
+        distances = {row: 1.0 - score / best for row, score in hits}
+        distances.update(zip(semantic_rows, semantic.distances.tolist()))
+        distances.update((row, 0.0) for row in exact_rows)
+
+        ranked = exact_rows + reciprocal_rank_fusion([[row for row, _ in hits], semantic_rows])
+        rows = list(dict.fromkeys(ranked))[:n_results]
+        return SearchResults(table, rows, [distances[row] for row in rows])
+
+    def _result_key(self, state: SearchState, query: str, n_results: int) -> tuple:
+        """Result cache key: (collection name, collection version, backend settings, normalized query, n_results)."""
+        # The version of the state that answered, so results are never cached under a newer one
+        return (self.collection_name, state.version, self.embedding_backend,
+                self.backend, self.quantization, self.rerank, self.retrieval,
+                self._normalize_query(query), n_results)
+
+    def embed(self, texts: list[str]) -> list:
+        """
+        Embed query texts, reusing cached embeddings and encoding only the misses in one batch.
+
+        Args:
+            texts (list[str]): Query texts to embed.
+
+        Returns:
+            list: One embedding per input text, in order.
+        """
+        self.load()
+        keys = [(self.model_name, self.embedding_backend, self._normalize_query(text)) for text in texts]
+        embeddings = [self.embedding_cache.get(key) for key in keys]
+
+        missing = list(dict.fromkeys(key for key, emb in zip(keys, embeddings) if emb is None))
+        if missing:
+            with span("embed"):
+                encoded = dict(zip(missing, self.ef([key[-1] for key in missing])))
+            for key, emb in encoded.items():
+                self.embedding_cache.put(key, emb)
+            embeddings = [encoded[key] if emb is None else emb for key, emb in zip(keys, embeddings)]
+
+        return embeddings
+
+    def embedding_cache_stats(self) -> dict:
+        """Return hit/miss/eviction counters of the query-embedding cache."""
+        return self.embedding_cache.stats()
+
+    @staticmethod
+    def result_cache_stats() -> dict:
+        """Return hit/miss/eviction counters of the process-wide result cache."""
+        return RESULT_CACHE.stats()
+
+    @staticmethod
+    def _normalize_query(text: str) -> str:
+        """Normalize query text so trivially different spellings share a cache entry."""
+        return " ".join(unicodedata.normalize("NFC", text).split())
 
-        output = []
-        
-        if not results['ids'] or not results['ids'][0]:
-            print("No results found.")
-            return output
-
-        # Format results
-        count = len(results['ids'][0])
-        for i in range(count):
-            item = {
-                "id": results['ids'][0][i],
-                "distance": results['distances'][0][i],
-                "document": results['documents'][0][i],
-                "metadata": results['metadatas'][0][i]
-            }
-            output.append(item)
-            
-        return output
 
 if __name__ == "__main__":
     # Test the searcher
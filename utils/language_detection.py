@@ -0,0 +1,80 @@
+from bisect import bisect_right
+
+# Unicode blocks whose script identifies a single language (ISO 639-3).
+# Scripts shared by several languages (Latin, Cyrillic, Arabic, Devanagari, Han...) are
+# deliberately absent so that text written in them goes to the statistical detector.
+_SCRIPT_RANGES = sorted([
+    (0x0370, 0x03FF, 'ell'),  # Greek
+    (0x0590, 0x05FF, 'heb'),  # Hebrew
+    (0x0980, 0x09FF, 'ben'),  # Bengali
+    (0x0A00, 0x0A7F, 'pan'),  # Gurmukhi
+    (0x0A80, 0x0AFF, 'guj'),  # Gujarati
+    (0x0B80, 0x0BFF, 'tam'),  # Tamil
+    (0x0C00, 0x0C7F, 'tel'),  # Telugu
+    (0x0C80, 0x0CFF, 'kan'),  # Kannada
+    (0x0D00, 0x0D7F, 'mal'),  # Malayalam
+    (0x0E00, 0x0E7F, 'tha'),  # Thai
+    (0x1100, 0x11FF, 'kor'),  # Hangul Jamo
+    (0x3040, 0x309F, 'jpn'),  # Hiragana
+    (0x30A0, 0x30FF, 'jpn'),  # Katakana
+    (0x3130, 0x318F, 'kor'),  # Hangul Compatibility Jamo
+    (0x31F0, 0x31FF, 'jpn'),  # Katakana Phonetic Extensions
+    (0xAC00, 0xD7AF, 'kor'),  # Hangul Syllables
+    (0xFF66, 0xFF9F, 'jpn'),  # Halfwidth Katakana
+])
+_RANGE_STARTS = [start for start, _, _ in _SCRIPT_RANGES]
+
+# Han ideographs are shared by Chinese and Japanese (kanji): only kana next to them decides
+_HAN_RANGES = (
+    (0x3400, 0x4DBF),  # CJK Unified Ideographs Extension A
+    (0x4E00, 0x9FFF),  # CJK Unified Ideographs
+)
+
+
+def _is_han(char: str) -> bool:
+    code_point = ord(char)
+    return any(start <= code_point <= end for start, end in _HAN_RANGES)
+
+
+def _char_language(char: str) -> str | None:
+    """Return the language implied by the script of `char`, or None if ambiguous."""
+    code_point = ord(char)
+    i = bisect_right(_RANGE_STARTS, code_point) - 1
+    if i >= 0:
+        start, end, lang = _SCRIPT_RANGES[i]
+        if start <= code_point <= end:
+            return lang
+    return None
+
+
+def detect_script_language(text: str) -> str | None:
+    """
+    Classify `text` by Unicode script alone.
+
+    Returns:
+        str | None: ISO 639-3 code if every letter belongs to one single-language script
+            (Han mixed with kana counts as Japanese), otherwise None. Han alone is None.
+    """
+    found = set()
+    has_han = False
+    for char in text:
+        if not char.isalpha():
+            continue
+        if _is_han(char):
+            has_han = True
+            continue
+        lang = _char_language(char)
+        if lang is None:
+            # A letter from a shared script (e.g. Latin): the script alone can't decide
+            return None
+        found.add(lang)
+
+    if len(found) != 1:
+        # No letters or several scripts; Han alone could be Chinese or Japanese
+        return None
+    lang = found.pop()
+    if has_han and lang != 'jpn':
+        # Han next to Hangul or Thai: leave it to the statistical detector
+        return None
+    # Kanji written together with kana is Japanese
+    return lang
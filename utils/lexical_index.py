@@ -0,0 +1,145 @@
+import math
+import unicodedata
+from collections import defaultdict
+
+
+def split_words(text: str) -> list[str]:
+    """
+    Runs of letters, digits and combining marks (Unicode category M) in `text`; anything
+    else separates words. Unlike `\\w+`, this keeps Thai and Indic vowel signs inside
+    their word ("น้ำ" stays one word).
+    """
+    words, start = [], None
+    for i, char in enumerate(text):
+        if char.isalnum() or unicodedata.category(char)[0] == "M":
+            if start is None:
+                start = i
+        elif start is not None:
+            words.append(text[start:i])
+            start = None
+    if start is not None:
+        words.append(text[start:])
+    return words
+
+
+def _stem(token: str) -> str:
+    """Fold simple English plurals so "pizzas" and "pizza" share a term."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    """Case-folded, plural-folded word tokens (see `split_words`)."""
+    return [_stem(token) for token in split_words(text.casefold())]
+
+
+def normalize_phrase(text: str) -> str:
+    """Key under which a whole tag, description or query is matched exactly."""
+    return " ".join(tokenize(text))
+
+
+def short_description(document: str) -> str:
+    """The short description that src/crete_data.py puts in front of the LLM description."""
+    return document.split(". ", 1)[0]
+
+
+def reciprocal_rank_fusion(rankings: list[list], k: int = 60) -> list:
+    """
+    Fuse several best-first rankings of ids (or rows) with reciprocal rank fusion.
+
+    Each id scores sum(1 / (k + rank)) over the rankings it appears in; `k` damps the
+    influence of the very top ranks so that no single ranking dominates.
+    """
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] += 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class LexicalIndex:
+    """
+    In-memory inverted index over emoji tags and short descriptions with BM25 scoring.
+
+    Also keeps every whole tag and short description as an exact-match key, so queries
+    such as "pizza" or "red heart" are answered without running the embedding model.
+    """
+
+    def __init__(self, ids, documents, metadatas, k1: float = 1.2, b: float = 0.75):
+        """
+        Sequences are kept as given (not copied), like `NumpyIndex`.
+
+        Args:
+            ids (Sequence[str]): Emoji ids.
+            documents (Sequence[str]): Document text per id ("<short description>. <LLM description>").
+            metadatas (Sequence[dict]): Metadata per id, with comma-joined "tags".
+            k1 (float): BM25 term frequency saturation.
+            b (float): BM25 document length normalization.
+        """
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.k1 = k1
+        self.b = b
+
+        self.postings = defaultdict(list)  # term -> [(row, term frequency)]
+        self.phrases = defaultdict(list)   # normalized tag / short description -> rows
+        self.lengths = []
+
+        for row, (document, metadata) in enumerate(zip(documents, metadatas)):
+            fields = [short_description(document)]
+            fields.extend(tag for tag in (metadata or {}).get("tags", "").split(",") if tag.strip())
+
+            counts = defaultdict(int)
+            for field in fields:
+                phrase = normalize_phrase(field)
+                if phrase and (not self.phrases[phrase] or self.phrases[phrase][-1] != row):
+                    self.phrases[phrase].append(row)
+                for term in phrase.split():
+                    counts[term] += 1
+
+            for term, tf in counts.items():
+                self.postings[term].append((row, tf))
+            self.lengths.append(sum(counts.values()))
+
+        self.avg_length = sum(self.lengths) / max(len(self.lengths), 1)
+        n_docs = len(self.lengths)
+        self.idf = {
+            term: math.log(1 + (n_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+            for term, rows in self.postings.items()
+        }
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def exact(self, query: str) -> list[int]:
+        """Rows whose short description or one of whose tags equals the query (after normalization)."""
+        return list(self.phrases.get(normalize_phrase(query), ()))
+
+    def search(self, query: str, n_results: int = 10) -> list[tuple[int, float]]:
+        """
+        BM25 search.
+
+        Returns:
+            list[tuple[int, float]]: Up to `n_results` (row, score) pairs, best first.
+        """
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for row, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[row] / self.avg_length)
+                scores[row] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]
+
+    def coverage(self, query: str, row: int) -> float:
+        """Fraction of the query's terms found in the tags / short description of `row`."""
+        terms = set(tokenize(query))
+        if not terms:
+            return 0.0
+        found = sum(1 for term in terms if any(r == row for r, _ in self.postings.get(term, ())))
+        return found / len(terms)
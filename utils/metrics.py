@@ -0,0 +1,176 @@
+import contextvars
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds in seconds, from 50µs (a cached lookup) to 10s (a cold model load)
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_NAME = "emoji_search_stage_duration_seconds"
+
+
+class Histogram:
+    """Thread-safe latency histogram with fixed buckets (Prometheus semantics)."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, seconds)] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self) -> tuple[list[int], float, int]:
+        """Return (per-bucket counts, sum, count) as one consistent view."""
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class MetricsRegistry:
+    """Per-stage histograms of one process."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage: str) -> Histogram:
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, stage: str, seconds: float):
+        self.histogram(stage).observe(seconds)
+
+    def stages(self) -> list[str]:
+        return sorted(self._histograms)
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+    def render_prometheus(self, name: str = METRIC_NAME) -> str:
+        """Render every histogram in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {name} Time spent per search pipeline stage.",
+            f"# TYPE {name} histogram",
+        ]
+        for stage in self.stages():
+            counts, total, count = self._histograms[stage].snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry every span reports to
+REGISTRY = MetricsRegistry()
+
+_current_trace = contextvars.ContextVar("emoji_search_trace", default=None)
+
+
+class Trace:
+    """Spans recorded while handling one query, for the UI's timing breakdown."""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.spans.append((stage, seconds))
+
+    def breakdown(self) -> list[dict]:
+        """Calls, total and max milliseconds per stage, in order of first occurrence."""
+        stages = {}
+        with self._lock:
+            spans = list(self.spans)
+        for stage, seconds in spans:
+            entry = stages.setdefault(stage, {"stage": stage, "calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+            entry["calls"] += 1
+            entry["total_ms"] += 1000 * seconds
+            entry["max_ms"] = max(entry["max_ms"], 1000 * seconds)
+        return list(stages.values())
+
+
+@contextmanager
+def span(stage: str):
+    """Time the enclosed block into the stage's histogram and the current trace, if any."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        REGISTRY.observe(stage, elapsed)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(stage, elapsed)
+
+
+def timed(stage: str):
+    """Decorator form of `span`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def trace():
+    """Collect the spans of the enclosed block (and of work started with `submit`) into a Trace."""
+    current = Trace()
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        _current_trace.reset(token)
+
+
+def submit(executor, fn, *args, **kwargs):
+    """`executor.submit` that carries the current trace over to the worker thread."""
+    context = contextvars.copy_context()
+    return executor.submit(context.run, fn, *args, **kwargs)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serve GET /metrics from a daemon thread (for processes without their own HTTP server).
+    Listens on localhost only unless another `host` is given.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    return server
@@ -0,0 +1,100 @@
+import asyncio
+
+
+class MicroBatcher:
+    """
+    Collects concurrent search requests for a few milliseconds and answers them with one
+    `search_many` call per distinct result count in the batch: one embedding batch and
+    one vector query each.
+
+    While a batch is being searched new requests keep queueing, so under load batches
+    grow on their own and throughput scales with batch size.
+    """
+
+    def __init__(self, search_many, max_batch_size=64, max_wait_ms=5.0, executor=None):
+        """
+        Args:
+            search_many (callable): `EmojiSearcher.search_many`-compatible function.
+            max_batch_size (int): Maximum number of requests per batch.
+            max_wait_ms (float): How long the first request of a batch waits for company.
+            executor (Executor | None): Where the blocking search runs (default loop executor).
+        """
+        self.search_many = search_many
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = executor
+        self._queue = None
+        self._worker = None
+        # Batch sizes seen so far, for monitoring
+        self.batches = 0
+        self.batched_requests = 0
+
+    async def search(self, query: str, n_results: int = 10):
+        """Queue one query and wait for its results (same shape as `EmojiSearcher.search`)."""
+        loop = asyncio.get_running_loop()
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+        future = loop.create_future()
+        await self._queue.put((query, n_results, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch):
+        # One search per requested depth: hybrid retrieval ranks differently at different
+        # depths, so a request's results must not depend on what else shares its batch
+        groups = {}
+        for request in batch:
+            groups.setdefault(request[1], []).append(request)
+        self.batches += 1
+        self.batched_requests += len(batch)
+        await asyncio.gather(*(self._search_group(n_results, group) for n_results, group in groups.items()))
+
+    async def _search_group(self, n_results, group):
+        loop = asyncio.get_running_loop()
+        queries = [query for query, _, _ in group]
+        try:
+            results = await loop.run_in_executor(self.executor, self.search_many, queries, n_results)
+        except Exception as e:
+            for _, _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for query, _, future in group:
+            if not future.done():
+                future.set_result(results.get(query, []))
+
+    def stats(self) -> dict:
+        """Return batch counters."""
+        return {
+            "batches": self.batches,
+            "requests": self.batched_requests,
+            "mean_batch_size": self.batched_requests / self.batches if self.batches else 0.0,
+        }
+
+    async def close(self):
+        """Stop the batching task."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
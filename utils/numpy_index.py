@@ -0,0 +1,310 @@
+import json
+import mmap
+import os
+
+import numpy as np
+
+from utils.emoji_index_file import EmojiIndexFile, is_index_file
+
+
+# Rows are scored in blocks of this size so quantized codes are never upcast in full
+SCORE_CHUNK_SIZE = 4096
+
+
+def _row_norms(matrix, chunk_size=SCORE_CHUNK_SIZE) -> np.ndarray:
+    """L2 norm of every row, computed block by block so memory-mapped input is not upcast at once."""
+    norms = np.empty(len(matrix), dtype=np.float32)
+    for start in range(0, len(matrix), chunk_size):
+        block = np.asarray(matrix[start:start + chunk_size], dtype=np.float32)
+        norms[start:start + chunk_size] = np.linalg.norm(block, axis=1)
+    return norms
+
+
+def _is_memory_mapped(array) -> bool:
+    """True if `array` is a view of a memory map, i.e. its data lives in the page cache."""
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        array = getattr(array, "base", None)
+    return False
+
+
+def quantize(matrix, kind: str, chunk_size=SCORE_CHUNK_SIZE):
+    """
+    Quantize an embedding matrix.
+
+    Args:
+        matrix (array-like): Embeddings, shape (n, dim).
+        kind (str): "float16", or "int8" with one symmetric scale per vector.
+        chunk_size (int): Rows converted at a time.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray | None]: The codes and the per-row scales (int8 only).
+    """
+    if kind == "float16":
+        if matrix.dtype == np.float16:
+            return matrix, None
+        return np.ascontiguousarray(matrix, dtype=np.float16), None
+
+    if kind != "int8":
+        raise ValueError(f"Unsupported quantization: {kind}")
+
+    codes = np.empty(matrix.shape, dtype=np.int8)
+    scales = np.empty(len(matrix), dtype=np.float32)
+    for start in range(0, len(matrix), chunk_size):
+        block = np.asarray(matrix[start:start + chunk_size], dtype=np.float32)
+        block_scales = np.abs(block).max(axis=1) / 127.0
+        block_scales[block_scales == 0] = 1.0
+        codes[start:start + chunk_size] = np.clip(np.rint(block / block_scales[:, None]), -127, 127)
+        scales[start:start + chunk_size] = block_scales
+    return codes, scales
+
+
+class NumpyIndex:
+    """
+    Exact in-memory vector index over the whole emoji collection.
+
+    All embeddings live in one contiguous float32 matrix, so a batch of queries is a
+    single matrix product followed by `argpartition`. For a few thousand emojis this is
+    faster than an HNSW traversal and always returns the exact top-k.
+
+    Embeddings can instead be held as float16 or int8 (2x / 4x smaller). Scoring then
+    uses the quantized vectors, optionally re-ranking the best `rerank` candidates of
+    each query with the exact vectors.
+
+    `query` mirrors `chromadb.Collection.query` and reports the same distances as the
+    collection's `hnsw:space` ("l2" = squared euclidean, "cosine", "ip").
+    """
+
+    def __init__(self, ids, embeddings, documents, metadatas, space="l2", quantization=None, rerank=0):
+        """
+        Sequences are kept as given (not copied), so memory-mapped tables stay shared.
+
+        Args:
+            ids (Sequence[str]): Emoji ids (unicode code points).
+            embeddings (array-like): One embedding per id, shape (n, dim).
+            documents (Sequence[str]): Document text per id.
+            metadatas (Sequence[dict]): Metadata per id.
+            space (str): Distance function used by the source collection.
+            quantization (str | None): None, "float16" or "int8" storage for scoring.
+            rerank (int): With quantization, re-score this many top candidates per query
+                with the unquantized vectors (0 disables). Those are read from `embeddings`
+                on demand, which must then be memory-mapped (an exported index directory,
+                see `from_index_file`): a heap copy would take more memory than float32 alone.
+        """
+        if space not in ("l2", "cosine", "ip"):
+            raise ValueError(f"Unsupported distance space: {space}")
+        if quantization not in (None, "float16", "int8"):
+            raise ValueError(f"Unsupported quantization: {quantization}")
+
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.space = space
+        self.quantization = quantization
+        self.rerank = rerank if quantization else 0
+        self.collection_version = None
+
+        source = np.asarray(embeddings)
+        if self.rerank and not _is_memory_mapped(source):
+            raise ValueError("Re-ranking needs memory-mapped embeddings; load an exported index directory.")
+        if space == "cosine":
+            source = np.asarray(source, dtype=np.float32) / np.maximum(_row_norms(source), 1e-12)[:, None]
+        # Precompute what each distance function needs so a query is one matmul
+        self.sq_norms = _row_norms(source) ** 2
+
+        if quantization is None:
+            # A C-contiguous float32 memmap passes through without a copy
+            self.embeddings = np.ascontiguousarray(source, dtype=np.float32)
+            self.codes, self.scales = self.embeddings, None
+        else:
+            # The unnormalized mapped rows; `_rerank` normalizes the few it reads for cosine
+            self.embeddings = np.asarray(embeddings) if self.rerank else None
+            self.codes, self.scales = quantize(source, quantization)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_collection(cls, collection, batch_size=5000, **kwargs):
+        """
+        Load every embedding, document and metadata entry of a ChromaDB collection.
+        Extra keyword arguments (quantization, rerank) are passed to the constructor.
+        """
+        ids, embeddings, documents, metadatas = [], [], [], []
+        total = collection.count()
+        for offset in range(0, total, batch_size):
+            batch = collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=batch_size,
+                offset=offset
+            )
+            ids.extend(batch["ids"])
+            embeddings.extend(batch["embeddings"])
+            documents.extend(batch["documents"])
+            metadatas.extend(batch["metadatas"])
+
+        space = (collection.metadata or {}).get("hnsw:space", "l2")
+        return cls(ids, np.asarray(embeddings, dtype=np.float32), documents, metadatas, space=space, **kwargs)
+
+    def save(self, path):
+        """Export the index to a single `.npz` file."""
+        if self.embeddings is None:
+            raise ValueError("Cannot save a quantized index that does not keep its exact embeddings.")
+
+        np.savez(
+            path,
+            embeddings=self.embeddings,
+            ids=np.array(list(self.ids)),
+            documents=np.array(list(self.documents)),
+            metadatas=np.array([json.dumps(m, ensure_ascii=False) for m in self.metadatas]),
+            space=np.array(self.space)
+        )
+
+    @classmethod
+    def from_index_file(cls, path, **kwargs):
+        """
+        Open an index directory written by `utils.emoji_index_file.write_index_file`.
+
+        float32 embeddings are used straight from the memory map. float16 ones are
+        upcast into a private float32 copy unless `quantization="float16"` is requested,
+        in which case they are scored straight from the memory map too.
+        """
+        index_file = EmojiIndexFile(path)
+        index = cls(
+            index_file.ids,
+            index_file.embeddings,
+            index_file.documents,
+            index_file.metadatas,
+            space=index_file.space,
+            **kwargs
+        )
+        index.collection_version = index_file.collection_version
+        return index
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """Load an index exported with `save`, or an exported index directory."""
+        if os.path.isdir(path) and is_index_file(path):
+            return cls.from_index_file(path, **kwargs)
+
+        with np.load(path) as data:
+            return cls(
+                data["ids"].tolist(),
+                data["embeddings"],
+                data["documents"].tolist(),
+                [json.loads(m) for m in data["metadatas"].tolist()],
+                space=str(data["space"]),
+                **kwargs
+            )
+
+    def memory_bytes(self) -> int:
+        """
+        Bytes of the vectors used for scoring (excluding tables). Re-rank vectors are
+        always memory-mapped, so they are not counted.
+        """
+        size = self.codes.nbytes + self.sq_norms.nbytes
+        if self.scales is not None:
+            size += self.scales.nbytes
+        return size
+
+    @staticmethod
+    def _as_queries(query_embeddings) -> np.ndarray:
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        return queries
+
+    def _to_distances(self, dots, queries, sq_norms) -> np.ndarray:
+        """Turn query/row dot products into the collection's distance."""
+        if self.space == "l2":
+            q_sq = np.einsum("ij,ij->i", queries, queries)
+            return np.maximum(q_sq[:, None] + sq_norms - 2 * dots, 0.0)
+        if self.space == "cosine":
+            q_norms = np.maximum(np.linalg.norm(queries, axis=1), 1e-12)
+            return 1.0 - dots / q_norms[:, None]
+        return 1.0 - dots
+
+    def _dots(self, queries) -> np.ndarray:
+        """Dot products of every query with every row, using the (possibly quantized) codes."""
+        if self.quantization is None:
+            return queries @ self.codes.T
+
+        dots = np.empty((len(queries), len(self.codes)), dtype=np.float32)
+        for start in range(0, len(self.codes), SCORE_CHUNK_SIZE):
+            end = start + SCORE_CHUNK_SIZE
+            block = queries @ np.asarray(self.codes[start:end], dtype=np.float32).T
+            if self.scales is not None:
+                block *= self.scales[start:end]
+            dots[:, start:end] = block
+        return dots
+
+    def distances(self, query_embeddings) -> np.ndarray:
+        """
+        Compute distances from each query to every indexed emoji (approximate when quantized).
+
+        Returns:
+            np.ndarray: Matrix of shape (n_queries, n_emojis).
+        """
+        queries = self._as_queries(query_embeddings)
+        return self._to_distances(self._dots(queries), queries, self.sq_norms[None, :])
+
+    def top_k(self, distances: np.ndarray, n_results: int) -> np.ndarray:
+        """Return row indices of the `n_results` smallest distances per query, nearest first."""
+        k = min(n_results, distances.shape[1])
+        if k <= 0:
+            return np.empty((distances.shape[0], 0), dtype=np.intp)
+        if k < distances.shape[1]:
+            candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.tile(np.arange(distances.shape[1]), (distances.shape[0], 1))
+        order = np.argsort(np.take_along_axis(distances, candidates, axis=1), axis=1)
+        return np.take_along_axis(candidates, order, axis=1)
+
+    def _rerank(self, queries, candidates, n_results):
+        """Re-score each query's candidate rows with the unquantized vectors."""
+        rows, row_distances = [], []
+        for q, query_rows in enumerate(candidates):
+            query_rows = np.sort(query_rows)
+            exact = np.asarray(self.embeddings[query_rows], dtype=np.float32)
+            if self.space == "cosine":
+                exact /= np.maximum(np.linalg.norm(exact, axis=1), 1e-12)[:, None]
+            query = queries[q:q + 1]
+            exact_distances = self._to_distances(
+                query @ exact.T, query, self.sq_norms[query_rows][None, :]
+            )
+            best = self.top_k(exact_distances, n_results)[0]
+            rows.append(query_rows[best])
+            row_distances.append(exact_distances[0, best])
+        return rows, row_distances
+
+    def search(self, query_embeddings, n_results=10):
+        """
+        Top-k search returning row indices and distances per query, nearest first.
+
+        Returns:
+            tuple[list[np.ndarray], list[np.ndarray]]: Rows and distances for each query.
+        """
+        queries = self._as_queries(query_embeddings)
+        distances = self._to_distances(self._dots(queries), queries, self.sq_norms[None, :])
+
+        if self.rerank and self.embeddings is not None:
+            candidates = self.top_k(distances, max(self.rerank, n_results))
+            return self._rerank(queries, candidates, n_results)
+
+        rows = self.top_k(distances, n_results)
+        return list(rows), list(np.take_along_axis(distances, rows, axis=1))
+
+    def query(self, query_embeddings, n_results=10) -> dict:
+        """
+        Top-k search, returning the same nested-list dict shape as `Collection.query`.
+        """
+        rows, distances = self.search(query_embeddings, n_results)
+
+        results = {"ids": [], "distances": [], "documents": [], "metadatas": []}
+        for query_rows, query_distances in zip(rows, distances):
+            results["ids"].append([self.ids[r] for r in query_rows])
+            results["distances"].append(query_distances.tolist())
+            results["documents"].append([self.documents[r] for r in query_rows])
+            results["metadatas"].append([self.metadatas[r] for r in query_rows])
+        return results
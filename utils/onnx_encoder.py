@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+CONFIG_FILE = "encoder_config.json"
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+
+def default_model_dir(model_name: str) -> str:
+    """Directory an exported model is written to / read from by default."""
+    return os.path.join("onnx_models", model_name.split("/")[-1])
+
+
+def export_onnx(model_name: str, output_dir: str | None = None, quantize: bool = False) -> str:
+    """
+    Export a SentenceTransformer model to ONNX, together with its fast tokenizer and
+    the pooling settings needed to reproduce `SentenceTransformer.encode`.
+
+    Needs torch and sentence-transformers; the exported model does not.
+
+    Args:
+        model_name (str): SentenceTransformer model, e.g. the collection's model.
+        output_dir (str | None): Where to write the export (default: onnx_models/<model>).
+        quantize (bool): Also write a dynamically int8-quantized copy.
+
+    Returns:
+        str: The output directory.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    output_dir = output_dir or default_model_dir(model_name)
+    os.makedirs(output_dir, exist_ok=True)
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0]
+    pooling = next(m for m in st_model if isinstance(m, Pooling))
+    if pooling.get_pooling_mode_str() != "mean":
+        raise ValueError(f"Only mean pooling is supported, {model_name} uses {pooling.get_pooling_mode_str()}")
+
+    tokenizer = transformer.tokenizer
+    tokenizer.save_pretrained(output_dir)
+
+    config = {
+        "model_name": model_name,
+        "max_seq_length": st_model.max_seq_length,
+        "normalize": any(isinstance(m, Normalize) for m in st_model),
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+    }
+    with open(os.path.join(output_dir, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+    auto_model = transformer.auto_model.eval()
+    dummy = tokenizer(["export"], return_tensors="pt")
+    model_path = os.path.join(output_dir, MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            auto_model,
+            (dummy["input_ids"], dummy["attention_mask"]),
+            model_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=17,
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(model_path, os.path.join(output_dir, QUANTIZED_MODEL_FILE), weight_type=QuantType.QInt8)
+
+    print(f"Exported {model_name} to {output_dir}")
+    return output_dir
+
+
+class OnnxEmbeddingFunction:
+    """
+    CPU embedding function running an exported model with onnxruntime.
+
+    Produces the same vectors as the SentenceTransformer model it was exported from
+    (mean pooling, optional normalization) without importing torch.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = False, num_threads: int | None = None):
+        """
+        Args:
+            model_dir (str): Directory written by `export_onnx`.
+            quantized (bool): Use the int8 dynamically quantized model.
+            num_threads (int | None): onnxruntime intra-op threads (None = library default).
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, CONFIG_FILE), encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.model_name = self.config["model_name"]
+        self.normalize = self.config["normalize"]
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        model_file = QUANTIZED_MODEL_FILE if quantized else MODEL_FILE
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def __call__(self, input: list[str]) -> list[np.ndarray]:
+        if not input:
+            return []
+
+        encodings = self.tokenizer.encode_batch(list(input))
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real (non-padding) tokens, as in sentence-transformers
+        mask = attention_mask[:, :, None].astype(np.float32)
+        embeddings = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        if self.normalize:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return list(embeddings.astype(np.float32))
+
+
+def check_parity(model_dir: str, texts: list[str], quantized: bool = False) -> dict:
+    """
+    Compare ONNX embeddings against the original torch SentenceTransformer model.
+
+    Returns:
+        dict: Max absolute difference and min/mean cosine similarity over `texts`.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    onnx_ef = OnnxEmbeddingFunction(model_dir, quantized=quantized)
+    torch_embeddings = SentenceTransformer(onnx_ef.model_name, device="cpu").encode(texts, convert_to_numpy=True)
+    onnx_embeddings = np.stack(onnx_ef(texts))
+
+    cosine = (torch_embeddings * onnx_embeddings).sum(axis=1) / (
+        np.linalg.norm(torch_embeddings, axis=1) * np.linalg.norm(onnx_embeddings, axis=1)
+    )
+    return {
+        "model_name": onnx_ef.model_name,
+        "quantized": quantized,
+        "texts": len(texts),
+        "max_abs_diff": float(np.abs(torch_embeddings - onnx_embeddings).max()),
+        "min_cosine": float(cosine.min()),
+        "mean_cosine": float(cosine.mean()),
+    }
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export / verify ONNX query encoders.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export a SentenceTransformer model to ONNX.")
+    export_parser.add_argument("--model", default="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+    export_parser.add_argument("--output", help="Output directory (default: onnx_models/<model>).")
+    export_parser.add_argument("--quantize", action="store_true", help="Also write an int8 quantized model.")
+
+    parity_parser = subparsers.add_parser("parity", help="Compare ONNX and torch embeddings.")
+    parity_parser.add_argument("--model-dir", default=default_model_dir(
+        "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"))
+    parity_parser.add_argument("--quantized", action="store_true", help="Check the int8 model.")
+    parity_parser.add_argument("--min-cosine", type=float, default=0.99,
+                               help="Exit with an error if any text falls below this cosine similarity.")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export_onnx(args.model, args.output, quantize=args.quantize)
+    else:
+        from utils.subword_tokenizer import MULTILINGUAL_QUERIES, THAI_COMPOUND_EXAMPLES
+
+        texts = MULTILINGUAL_QUERIES + THAI_COMPOUND_EXAMPLES[:5] + ["sunflower"]
+        report = check_parity(args.model_dir, texts, quantized=args.quantized)
+        print(json.dumps(report, indent=2))
+        if report["min_cosine"] < args.min_cosine:
+            raise SystemExit(f"Parity check failed: min cosine {report['min_cosine']:.4f} < {args.min_cosine}")
@@ -0,0 +1,74 @@
+import argparse
+import os
+
+from utils.wordnet_lexicon import DEFAULT_LEXICON_PATH
+
+# NLTK corpora the tokenizer needs, by download id and data path
+NLTK_CORPORA = {
+    "wordnet": "corpora/wordnet",
+    "omw-1.4": "corpora/omw-1.4",
+}
+
+
+def download_corpora(download_dir: str | None = None):
+    """Download the WordNet / OMW corpora unless NLTK can already find them."""
+    import nltk
+
+    if download_dir:
+        nltk.data.path.insert(0, download_dir)
+    for name, path in NLTK_CORPORA.items():
+        try:
+            nltk.data.find(path)
+            print(f"NLTK corpus '{name}' already present")
+        except LookupError:
+            if not nltk.download(name, download_dir=download_dir):
+                raise RuntimeError(f"Failed to download NLTK corpus '{name}'")
+
+
+def build_lexicon(path: str = DEFAULT_LEXICON_PATH, rebuild: bool = False):
+    """Precompute the WordNet lexicon file read by SubwordTokenizer."""
+    from utils.subword_tokenizer import SubwordTokenizer
+    from utils.wordnet_lexicon import WordNetLexicon
+
+    if os.path.exists(path) and not rebuild:
+        print(f"Lexicon '{path}' already present")
+        return
+    lexicon = WordNetLexicon(SubwordTokenizer().supported_langs)
+    lexicon.build_all()
+    lexicon.save(path)
+    print(f"Saved lexicon to {path}")
+
+
+def download_models(model_names):
+    """Fetch the embedding models into the Hugging Face cache."""
+    from sentence_transformers import SentenceTransformer
+
+    for model_name in model_names:
+        SentenceTransformer(model_name, device="cpu")
+        print(f"Model '{model_name}' cached")
+
+
+if __name__ == "__main__":
+    # Fetch everything the app needs at runtime, e.g. while building a deploy image:
+    #   python -m utils.provision
+    from utils.emoji_searcher import COLLECTION_MODELS
+
+    parser = argparse.ArgumentParser(description="Download corpora and models and build the WordNet lexicon.")
+    parser.add_argument("--nltk-dir", help="Directory to download the NLTK corpora to (default: NLTK's).")
+    parser.add_argument("--lexicon-path", default=DEFAULT_LEXICON_PATH, help="Lexicon file to build.")
+    parser.add_argument("--rebuild-lexicon", action="store_true", help="Rebuild the lexicon even if it exists.")
+    parser.add_argument("--models", nargs="*", default=sorted(set(COLLECTION_MODELS.values())),
+                        help="Embedding models to cache (default: every collection's model).")
+    parser.add_argument("--skip-models", action="store_true", help="Do not download embedding models.")
+    parser.add_argument("--onnx", action="store_true", help="Also export the ONNX query encoders (int8 included).")
+    args = parser.parse_args()
+
+    download_corpora(args.nltk_dir)
+    build_lexicon(args.lexicon_path, rebuild=args.rebuild_lexicon)
+    if not args.skip_models:
+        download_models(args.models)
+    if args.onnx:
+        from utils.onnx_encoder import export_onnx
+
+        for model_name in args.models:
+            export_onnx(model_name, quantize=True)
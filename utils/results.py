@@ -0,0 +1,144 @@
+import sys
+
+import numpy as np
+
+# Metadata values up to this length (characters, code points, tags) are interned
+_INTERN_MAX_LEN = 256
+
+
+class EmojiTable:
+    """
+    Shared, read-only id / document / metadata table of every emoji in the index.
+
+    Search results only hold integer rows into it, so documents and metadata are
+    stored once per process instead of being copied out of ChromaDB on every query.
+    """
+
+    __slots__ = ("ids", "documents", "metadatas", "row_of")
+
+    def __init__(self, ids, documents, metadatas):
+        """
+        Sequences are kept as given (not copied), so memory-mapped tables stay shared.
+        """
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.row_of = {emoji_id: row for row, emoji_id in enumerate(ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def intern(cls, ids, documents, metadatas) -> "EmojiTable":
+        """Build a table from lists fetched from ChromaDB, interning ids and short metadata strings."""
+        def intern_value(value):
+            if isinstance(value, str) and len(value) <= _INTERN_MAX_LEN:
+                return sys.intern(value)
+            return value
+
+        return cls(
+            [sys.intern(emoji_id) for emoji_id in ids],
+            list(documents),
+            [{sys.intern(k): intern_value(v) for k, v in (metadata or {}).items()} for metadata in metadatas]
+        )
+
+    def rows(self, ids) -> np.ndarray:
+        """Rows of `ids`, or -1 for ids not in the table."""
+        return np.fromiter((self.row_of.get(emoji_id, -1) for emoji_id in ids), dtype=np.int32, count=len(ids))
+
+
+class Hit:
+    """
+    View of one search result. Supports the dict-style access of the previous
+    list-of-dicts results (`hit["metadata"]`, `hit.get("document")`, `dict(hit)`)
+    as well as attributes, without copying anything out of the table.
+    """
+
+    __slots__ = ("_results", "_i")
+
+    FIELDS = ("id", "distance", "document", "metadata")
+
+    def __init__(self, results: "SearchResults", i: int):
+        self._results = results
+        self._i = i
+
+    @property
+    def row(self) -> int:
+        return int(self._results.rows[self._i])
+
+    @property
+    def id(self) -> str:
+        return self._results.table.ids[self.row]
+
+    @property
+    def distance(self) -> float:
+        return float(self._results.distances[self._i])
+
+    @property
+    def document(self) -> str:
+        return self._results.table.documents[self.row]
+
+    @property
+    def metadata(self) -> dict:
+        return self._results.table.metadatas[self.row]
+
+    def __getitem__(self, key: str):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def keys(self):
+        return self.FIELDS
+
+    def to_dict(self) -> dict:
+        """A plain dict copy, e.g. for JSON."""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self):
+        return f"Hit(id={self.id!r}, distance={self.distance:.4f})"
+
+
+class SearchResults:
+    """
+    Results of one query as parallel arrays: int32 rows into an `EmojiTable` and
+    float32 distances, nearest first. Indexing yields `Hit` views, slicing yields a
+    smaller `SearchResults`; both share the arrays, so treat them as read-only.
+    """
+
+    __slots__ = ("table", "rows", "distances")
+
+    def __init__(self, table: EmojiTable, rows, distances):
+        self.table = table
+        self.rows = np.asarray(rows, dtype=np.int32)
+        self.distances = np.asarray(distances, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return SearchResults(self.table, self.rows[i], self.distances[i])
+        if i < 0:
+            i += len(self.rows)
+        if not 0 <= i < len(self.rows):
+            raise IndexError("search result index out of range")
+        return Hit(self, i)
+
+    def __iter__(self):
+        for i in range(len(self.rows)):
+            yield Hit(self, i)
+
+    def __repr__(self):
+        return f"SearchResults({list(self)!r})"
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the result itself (the table is shared)."""
+        return self.rows.nbytes + self.distances.nbytes
+
+    def to_dicts(self) -> list[dict]:
+        """Plain list-of-dicts copy, e.g. for JSON."""
+        return [hit.to_dict() for hit in self]
@@ -0,0 +1,172 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from utils.emoji_searcher import EmojiSearcher, resolve_collection
+
+
+def parse_routes(spec: str | None) -> dict[str, str]:
+    """
+    Parse language routes written as "tha=e5,jpn=e5": ISO 639-3 codes (as returned by
+    `SubwordTokenizer.detect_language`) mapped to collections or their aliases.
+    """
+    routes = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        lang, sep, collection = (part.strip() for part in item.partition("="))
+        if not sep or not lang or not collection:
+            raise ValueError(f"Invalid route '{item}', expected <language>=<collection>")
+        routes[lang] = resolve_collection(collection)
+    return routes
+
+
+class SearcherRouter:
+    """
+    Several EmojiSearchers, one per collection (and so per embedding model), behind
+    the `search` / `search_many` interface of a single one.
+
+    A query goes to the collection named in the request, else to the collection routed
+    for its detected language, else to the default collection. Searchers are created and
+    loaded on first use. Before one is loaded, the least recently used idle searchers are
+    unloaded until the estimated memory of everything loaded fits the budget. Searchers
+    in use and the default searcher are never unloaded.
+    """
+
+    def __init__(self, default_collection, routes=None, detect_language=None, memory_budget_mb=None,
+                 idle_ttl=None, collection_kwargs=None, **searcher_kwargs):
+        """
+        Args:
+            default_collection (str): Collection (or alias) answering unrouted queries.
+            routes (dict | None): ISO 639-3 language code -> collection (or alias).
+            detect_language (callable | None): Text -> ISO 639-3 code, e.g.
+                `SubwordTokenizer.detect_language`. Without it only per-request choices route.
+            memory_budget_mb (float | None): Cap on the estimated memory of all loaded
+                searchers (see `EmojiSearcher.memory_bytes`); None for no cap.
+            idle_ttl (float | None): Unload non-default searchers unused for this many seconds.
+            collection_kwargs (dict | None): Collection (or alias) -> EmojiSearcher arguments
+                for that collection only, e.g. its own `index_path`.
+            **searcher_kwargs: EmojiSearcher arguments shared by every collection.
+        """
+        self.default_collection = resolve_collection(default_collection)
+        self.routes = {lang: resolve_collection(collection) for lang, collection in (routes or {}).items()}
+        self.detect_language = detect_language
+        self.memory_budget = memory_budget_mb * 1024 * 1024 if memory_budget_mb else None
+        self.idle_ttl = idle_ttl
+        self.collection_kwargs = {
+            resolve_collection(collection): kwargs for collection, kwargs in (collection_kwargs or {}).items()
+        }
+        searcher_kwargs.pop("lazy", None)
+        self.searcher_kwargs = searcher_kwargs
+
+        self._searchers = {}
+        self._last_used = {}
+        self._in_use = defaultdict(int)
+        self._lock = threading.Lock()
+        self.evictions = 0
+        # Loaded through the warm-up like a standalone searcher
+        self.default = self.searcher(self.default_collection)
+
+    def searcher(self, collection: str) -> EmojiSearcher:
+        """The searcher of a collection (created, not loaded, on first request)."""
+        collection = resolve_collection(collection)
+        with self._lock:
+            searcher = self._searchers.get(collection)
+            if searcher is None:
+                kwargs = {**self.searcher_kwargs, **self.collection_kwargs.get(collection, {})}
+                searcher = EmojiSearcher(collection_name=collection, lazy=True, **kwargs)
+                self._searchers[collection] = searcher
+            return searcher
+
+    def route(self, query: str, collection: str | None = None) -> str:
+        """Collection for a query: `collection` if given, else its language's route, else the default."""
+        if collection:
+            return resolve_collection(collection)
+        if self.routes and self.detect_language is not None:
+            return self.routes.get(self.detect_language(query), self.default_collection)
+        return self.default_collection
+
+    @contextmanager
+    def use(self, collection: str):
+        """Yield the collection's searcher, loaded, and keep it from being unloaded until exit."""
+        searcher = self.searcher(collection)
+        name = searcher.collection_name
+        with self._lock:
+            self._in_use[name] += 1
+            self._last_used[name] = time.monotonic()
+            self._evict(searcher)
+        try:
+            searcher.load()
+            yield searcher
+        finally:
+            with self._lock:
+                self._in_use[name] -= 1
+                self._last_used[name] = time.monotonic()
+
+    def _evict(self, incoming: EmojiSearcher):
+        """
+        Unload idle searchers, and least recently used ones while `incoming` would not fit
+        the budget. Called with the lock held.
+        """
+        if self.memory_budget is None and self.idle_ttl is None:
+            return
+
+        now = time.monotonic()
+        loaded = [
+            (self._last_used.get(name, 0.0), name, searcher)
+            for name, searcher in self._searchers.items()
+            if searcher is not incoming and searcher.ready.is_set()
+        ]
+        used = incoming.memory_bytes() + sum(searcher.memory_bytes() for _, _, searcher in loaded)
+        for last_used, name, searcher in sorted(loaded, key=lambda item: item[0]):
+            if name == self.default_collection or self._in_use[name]:
+                continue
+            idle = self.idle_ttl is not None and now - last_used > self.idle_ttl
+            over_budget = self.memory_budget is not None and used > self.memory_budget
+            if idle or over_budget:
+                print(f"Unloading collection '{name}' ({'idle' if idle else 'memory budget'}).")
+                used -= searcher.memory_bytes()
+                searcher.unload()
+                self.evictions += 1
+
+        if self.memory_budget is not None and used > self.memory_budget and not incoming.ready.is_set():
+            print(f"Warning: loading collection '{incoming.collection_name}' exceeds the memory budget "
+                  f"({used / 2**20:.0f} MB estimated, {self.memory_budget / 2**20:.0f} MB allowed).")
+
+    def search(self, query: str, n_results: int = 10, collection: str | None = None):
+        """`EmojiSearcher.search` on the routed collection."""
+        with self.use(self.route(query, collection)) as searcher:
+            return searcher.search(query, n_results=n_results)
+
+    def search_many(self, queries: list[str], n_results: int = 10, collection: str | None = None) -> dict:
+        """
+        `EmojiSearcher.search_many` with every query routed on its own; each collection
+        gets one batched call for its share of the queries.
+        """
+        groups = defaultdict(list)
+        for query in dict.fromkeys(queries):
+            groups[self.route(query, collection)].append(query)
+
+        output = {}
+        for name, group in groups.items():
+            with self.use(name) as searcher:
+                output.update(searcher.search_many(group, n_results=n_results))
+        return output
+
+    def stats(self) -> dict:
+        """Load state, estimated memory and use count of every collection created so far."""
+        with self._lock:
+            return {
+                "evictions": self.evictions,
+                "memory_budget_mb": self.memory_budget / 2**20 if self.memory_budget else None,
+                "collections": {
+                    name: {
+                        "model": searcher.model_name,
+                        "loaded": searcher.ready.is_set(),
+                        "estimated_mb": round(searcher.memory_bytes() / 2**20, 1),
+                        "in_use": self._in_use[name],
+                    }
+                    for name, searcher in self._searchers.items()
+                },
+            }
@@ -0,0 +1,249 @@
+import argparse
+import gzip
+import json
+import os
+import tempfile
+import threading
+
+FORMAT_VERSION = 2
+# Queries embedded per search_many call while building
+BUILD_BATCH_SIZE = 256
+# What app.py computes per query: results, splits (fewest parts first) and results per part
+N_RESULTS = 6
+MAX_SPLITS = 5
+PART_RESULTS = 1
+DEFAULT_TABLE_PATH = "compound_table.json.gz"
+DEFAULT_VOCABULARY_PATH = "compound_vocabulary.txt"
+
+
+def read_vocabulary(path: str) -> list[str]:
+    """One word per line; blank lines and lines starting with '#' are skipped."""
+    with open(path, encoding="utf-8") as f:
+        words = (line.strip() for line in f)
+        return list(dict.fromkeys(word for word in words if word and not word.startswith("#")))
+
+
+class SplitTable:
+    """
+    Precomputed compound splits and search results for a fixed vocabulary.
+
+    For every word the table holds what app.py would compute for it: the main search
+    results and, for each compound split, the results of every part. Result lists are
+    stored once per distinct text, so parts shared by many words cost nothing extra.
+    The table records the collection and lexicon versions it was built from, and the
+    search and build settings, since any of them changes the results.
+    """
+
+    def __init__(self, data: dict):
+        self.data = data
+        self.collection_version = data["collection_version"]
+        self.lexicon_version = data["lexicon_version"]
+
+    def __len__(self):
+        return len(self.data["splits"])
+
+    @staticmethod
+    def key(text: str) -> str:
+        """Lookup key of a query (same normalization as the search result cache)."""
+        from utils.emoji_searcher import EmojiSearcher
+
+        return EmojiSearcher._normalize_query(text)
+
+    @staticmethod
+    def settings(searcher, n_results=N_RESULTS, max_splits=MAX_SPLITS, part_results=PART_RESULTS) -> dict:
+        """Everything besides the versions that a table's contents depend on."""
+        return {
+            "collection": searcher.collection_name,
+            "backend": searcher.backend,
+            "quantization": searcher.quantization,
+            "rerank": searcher.rerank,
+            "embedding_backend": searcher.embedding_backend,
+            "retrieval": searcher.retrieval,
+            "n_results": n_results,
+            "max_splits": max_splits,
+            "part_results": part_results,
+        }
+
+    @classmethod
+    def build(cls, words, searcher, tokenizer, n_results=N_RESULTS, max_splits=MAX_SPLITS,
+              part_results=PART_RESULTS) -> "SplitTable":
+        """
+        Run the app's query path over `words`.
+
+        Args:
+            words (Iterable[str]): Vocabulary to precompute.
+            searcher (EmojiSearcher): Searcher whose results are stored.
+            tokenizer (SubwordTokenizer): Tokenizer used for the compound splits.
+            n_results (int): Results per word.
+            max_splits (int): Splits per word (fewest parts first, as in app.py).
+            part_results (int): Results per split part.
+        """
+        words = list(dict.fromkeys(cls.key(word) for word in words if word.strip()))
+        splits = {
+            word: tokenizer.split_compound(word, max_splits=max_splits, rank="fewest_parts")
+            for word in words
+        }
+        parts = list(dict.fromkeys(part for word_splits in splits.values() for split in word_splits for part in split))
+
+        return cls({
+            "format_version": FORMAT_VERSION,
+            "collection_version": searcher.collection_version(),
+            "lexicon_version": tokenizer.lexicon.version,
+            "settings": cls.settings(searcher, n_results, max_splits, part_results),
+            "results": cls._search_all(searcher, words, n_results),
+            "part_result_lists": cls._search_all(searcher, parts, part_results),
+            "splits": splits,
+        })
+
+    @staticmethod
+    def _search_all(searcher, queries: list[str], n_results: int) -> dict:
+        """Result dicts per query (plain dicts, so the table can be saved as JSON)."""
+        results = {}
+        for start in range(0, len(queries), BUILD_BATCH_SIZE):
+            batch = searcher.search_many(queries[start:start + BUILD_BATCH_SIZE], n_results=n_results)
+            results.update((query, query_results.to_dicts()) for query, query_results in batch.items())
+        return results
+
+    def lookup(self, text: str):
+        """
+        Return (results, splits) for a query, or None if it is not in the table. Each
+        split is a list of (part, part results), as rendered by app.py.
+        """
+        key = self.key(text)
+        splits = self.data["splits"].get(key)
+        if splits is None:
+            return None
+        part_results = self.data["part_result_lists"]
+        return (
+            self.data["results"].get(key, []),
+            [[(part, part_results.get(part, [])) for part in split] for split in splits]
+        )
+
+    def is_current(self, searcher, tokenizer, n_results=N_RESULTS, max_splits=MAX_SPLITS,
+                   part_results=PART_RESULTS) -> bool:
+        """
+        True if the table was built from the searcher's current collection, the tokenizer's
+        lexicon and the same search and build settings, so it matches a live search.
+        """
+        return (
+            self.data["settings"] == self.settings(searcher, n_results, max_splits, part_results)
+            and self.collection_version == searcher.collection_version()
+            and self.lexicon_version == tokenizer.lexicon.version
+        )
+
+    def save(self, path: str):
+        """Write the table to a gzipped JSON file (atomically)."""
+        # A unique temp file per writer, so concurrent rebuilds (e.g. several Streamlit
+        # workers) never interleave their writes
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, separators=(",", ":"), default=float)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "SplitTable":
+        """Load a table written by `save`."""
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported split table format version: {data.get('format_version')}")
+        return cls(data)
+
+
+class SplitTableStore:
+    """
+    The table app.py consults before any tokenizer or search work.
+
+    A missing or stale table (the collection was rebuilt, the lexicon changed, or it was
+    built with other settings) is rebuilt from the vocabulary file in a background
+    thread; lookups miss until the new table is ready.
+    """
+
+    def __init__(self, searcher, tokenizer, table_path=DEFAULT_TABLE_PATH, vocabulary_path=DEFAULT_VOCABULARY_PATH,
+                 n_results=N_RESULTS, max_splits=MAX_SPLITS, part_results=PART_RESULTS):
+        self.searcher = searcher
+        self.tokenizer = tokenizer
+        self.table_path = table_path
+        self.vocabulary_path = vocabulary_path
+        self.build_settings = {"n_results": n_results, "max_splits": max_splits, "part_results": part_results}
+        self.table = None
+        self._rebuilding = False
+        self._lock = threading.Lock()
+
+        if os.path.exists(table_path):
+            try:
+                self.table = SplitTable.load(table_path)
+            except Exception as e:
+                print(f"Error loading split table '{table_path}': {e}")
+
+    def lookup(self, text: str):
+        """`SplitTable.lookup` on the current table, or None (scheduling a rebuild if stale)."""
+        table = self.table
+        if table is not None and table.is_current(self.searcher, self.tokenizer, **self.build_settings):
+            return table.lookup(text)
+
+        self._schedule_rebuild()
+        return None
+
+    def _schedule_rebuild(self):
+        if not os.path.exists(self.vocabulary_path):
+            return
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild, name="split-table-rebuild", daemon=True).start()
+
+    def _rebuild(self):
+        try:
+            words = read_vocabulary(self.vocabulary_path)
+            print(f"Rebuilding split table for {len(words)} words...")
+            table = SplitTable.build(words, self.searcher, self.tokenizer, **self.build_settings)
+            table.save(self.table_path)
+            self.table = table
+            print(f"Saved split table to {self.table_path}")
+        except Exception as e:
+            print(f"Error rebuilding split table: {e}")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+
+if __name__ == "__main__":
+    # Precompute splits and results for a vocabulary:
+    #   python -m utils.split_table [--vocabulary words.txt] [--output compound_table.json.gz]
+    from utils.emoji_searcher import EmojiSearcher
+    from utils.subword_tokenizer import SubwordTokenizer
+
+    parser = argparse.ArgumentParser(description="Precompute compound splits and search results for a vocabulary.")
+    parser.add_argument("--vocabulary", default=DEFAULT_VOCABULARY_PATH, help="Word list, one word per line.")
+    parser.add_argument("--output", default=DEFAULT_TABLE_PATH, help="Gzipped JSON table to write.")
+    # The table is only used by an app searching with the same settings; the defaults
+    # come from the app's environment variables
+    parser.add_argument("--retrieval", choices=["semantic", "hybrid", "lexical_first"],
+                        default=os.environ.get("EMOJI_RETRIEVAL", "semantic"),
+                        help="Retrieval mode of the app that will use the table.")
+    parser.add_argument("--backend", choices=["chroma", "numpy"], default=os.environ.get("EMOJI_SEARCH_BACKEND", "chroma"))
+    parser.add_argument("--index-path", default=os.environ.get("EMOJI_INDEX_PATH"))
+    parser.add_argument("--embedding-backend", choices=["torch", "onnx"],
+                        default=os.environ.get("EMOJI_EMBEDDING_BACKEND", "torch"))
+    parser.add_argument("--onnx-quantized", action="store_true", default=os.environ.get("EMOJI_ONNX_QUANTIZED") == "1")
+    parser.add_argument("--check", action="store_true",
+                        help="Only report whether the existing table is up to date.")
+    args = parser.parse_args()
+
+    searcher = EmojiSearcher(retrieval=args.retrieval, backend=args.backend, index_path=args.index_path,
+                             embedding_backend=args.embedding_backend, onnx_quantized=args.onnx_quantized)
+    tokenizer = SubwordTokenizer()
+    if args.check:
+        current = os.path.exists(args.output) and SplitTable.load(args.output).is_current(searcher, tokenizer)
+        print(f"{args.output} is {'up to date' if current else 'stale'}")
+        raise SystemExit(0 if current else 1)
+
+    table = SplitTable.build(read_vocabulary(args.vocabulary), searcher, tokenizer)
+    table.save(args.output)
+    print(f"Saved {len(table)} words to {args.output}")
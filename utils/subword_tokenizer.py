@@ -1,20 +1,35 @@
-import nltk
-from nltk.corpus import wordnet as wn
-from langdetect import detect, detect_langs
+import itertools
+import threading
 
-# only run in first time
-try:
-    nltk.data.find('corpora/wordnet')
-except LookupError:
-    nltk.download('wordnet')
+from utils.compound_splitter import CompoundSplitter
+from utils.language_detection import detect_script_language
+from utils.lru_cache import LRUCache
+from utils.metrics import timed
+from utils.wordnet_lexicon import DEFAULT_LEXICON_PATH, WordNetLexicon
 
-try:
-    nltk.data.find('corpora/omw-1.4')
-except LookupError:
-    nltk.download('omw-1.4')
+# Fixed multilingual search queries shared by the benchmark, the quantization report and
+# the ONNX parity check, so their numbers describe the same corpus
+MULTILINGUAL_QUERIES = [
+    "dog", "หมา", "sad", "happy birthday", "spicy food", "แมวน่ารัก", "Bonjour",
+    "fire", "น้ำ", "sun", "flower", "pizza", "love", "รถไฟ", "ordinateur", "Regenschirm",
+    "寿司", "犬", "고양이", "кошка", "corazón", "Schmetterling", "gelato", "chuva",
+    "thumbs up", "party popper", "broken heart", "red apple", "rocket launch", "crying with laughter",
+]
+
+# Everyday Thai compounds, used as examples and in the benchmark corpus
+THAI_COMPOUND_EXAMPLES = [
+    "ตู้เย็น", "พัดลม", "เตารีด", "รถเมล์", "ปากกา",
+    "น้ำปลา", "ใจดี", "อ่อนน้อม", "บ้านพัก", "ทางม้าลาย",
+    "แม่ครัว", "ลูกน้อง", "หนังสือพิมพ์", "ไฟฉาย", "ยาสระผม",
+    "รองเท้า", "ผ้าห่ม", "เข็มขัด", "แกงเผ็ด", "กล้วยแขก",
+    "ตู้เย็นขนาดเล็ก", "เครื่องปรับอากาศ", "เตาไมโครเวฟ", "รถโดยสารประจำทาง", "พนักงานทำความสะอาด",
+    "หนังสือแบบเรียน", "เครื่องซักผ้า", "กล้องถ่ายรูป", "น้ำยาล้างจาน", "รองเท้าผ้าใบ",
+    "โทรศัพท์มือถือ", "ทางม้าลายข้ามถนน", "รถไฟความเร็วสูง", "แผ่นพับโฆษณา", "กระดาษชำระ",
+    "หม้อหุงข้าวไฟฟ้า", "กระเป๋าสตางค์", "ไม้บรรทัดเหล็ก", "ยาสีฟันสมุนไพร", "ช้อนส้อมพลาสติก"
+]
 
 class SubwordTokenizer:
-    def __init__(self):
+    def __init__(self, lexicon_path=DEFAULT_LEXICON_PATH):
         # ISO 639-1 to ISO 639-3 mapping
         self.lang_map = {
             'af': 'afr',
@@ -105,22 +120,68 @@ class SubwordTokenizer:
         # Ensure 'eng' is always supported (it's the base)
         self.supported_langs.append('eng')
 
+        # Lemma sets for fast dictionary lookups, loaded from a precomputed file if present
+        # (build it with `python -m utils.wordnet_lexicon`)
+        self.lexicon = WordNetLexicon(self.supported_langs, cache_path=lexicon_path)
+        self.splitter = CompoundSplitter(self.lexicon)
+
+        # Memoized detect_language results, keyed by query text
+        self.language_cache = LRUCache(max_size=4096)
+        self._langdetect = None
+
+        # Set by `warm_up`; splitting works before that, it is just slower the first time
+        self.ready = threading.Event()
+
+    def warm_up(self, langs=("tha", "eng")):
+        """
+        Load the lexicon and the prefix tries of the most used languages, and load
+        langdetect, so the first real query does not pay for it.
+        """
+        for lang in langs:
+            self.lexicon.trie(lang)
+        # The split table compares the lexicon version on every lookup
+        _ = self.lexicon.version
+        self.split_compound("sunflower")
+        self.ready.set()
+
     def iso_1_to_3(self, lang_code: str) -> str:
         """Convert ISO 639-1 code to ISO 639-3 code."""
         return self.lang_map.get(lang_code.lower(), 'eng')
 
+    @timed("detect_language")
     def detect_language(self, text: str) -> str:
         # print(f"Detecting language of {text}")
-        """Detect language of the text and return ISO 639-3 code."""
+        """
+        Detect language of the text and return ISO 639-3 code.
+
+        Text written entirely in a single-language script (Thai, kana, Hangul...) is
+        classified by script alone; only ambiguous text (e.g. Latin or Cyrillic) goes
+        through langdetect. Results are memoized per text.
+        """
+        lang_code = self.language_cache.get(text)
+        if lang_code is None:
+            lang_code = detect_script_language(text) or self._statistical_detect(text)
+            self.language_cache.put(text, lang_code)
+        return lang_code
+
+    def _statistical_detect(self, text: str) -> str:
+        """Detect language with langdetect, loading and seeding it on first use."""
         try:
+            if self._langdetect is None:
+                from langdetect import DetectorFactory, detect
+
+                # Seeded so the same text is always detected as the same language
+                DetectorFactory.seed = 0
+                self._langdetect = detect
             # Detect language
-            lang = detect(text)
+            lang = self._langdetect(text)
             # Convert to 3-letter code
             return self.iso_1_to_3(lang)
         except Exception as e:
             print(f"Error detecting language: {e}")
             return 'eng'
 
+    @timed("is_in_dict")
     def is_in_dict(self, word: str, lang_code: str = 'eng') -> bool:
         """Check if word exists in WordNet for the specified language."""
         # If language is not supported by WordNet, fallback to English
@@ -131,45 +192,39 @@ class SubwordTokenizer:
             lang_code = 'eng'
             
         try:
-            return len(wn.synsets(word, lang=lang_code)) > 0
+            return self.lexicon.contains(word, lang_code)
         except Exception as e:
             print(f"WordNet error: {e}")
             return False
 
-    def split_compound(self, compound_word: str, min_len: int = 2) -> list[list[str]]:
+    @timed("split_compound")
+    def split_compound(self, compound_word: str, min_len: int = 2, max_splits: int | None = None,
+                       rank: str | None = None) -> list[list[str]]:
         """
         Split compound word into 2 or more meaningful parts based on dictionary.
         min_len: Minimum length of subword (for Thai might need 1)
+        max_splits: Return at most this many splits (None for all)
+        rank: None for dictionary order, or "fewest_parts" to return splits with fewer parts first
+        """
+        return list(itertools.islice(
+            self.iter_splits(compound_word, min_len=min_len, rank=rank),
+            max_splits
+        ))
+
+    def iter_splits(self, compound_word: str, min_len: int = 2, rank: str | None = None):
+        """
+        Lazily yield the splits of `split_compound`, walking the language's prefix trie
+        once per start index instead of testing every substring.
         """
         lang_code = self.detect_language(compound_word)
-        memo = {}
+        if lang_code not in self.supported_langs:
+            print(f"Language {lang_code} not supported, falling back to 'eng'")
+            lang_code = 'eng'
 
-        def _recursive_split(text):
-            if text in memo:
-                return memo[text]
-            
-            valid_splits = []
-            
-            # Check if the text itself is a valid word
-            if self.is_in_dict(text, lang_code):
-                valid_splits.append([text])
-            
-            # Try to split into prefix + suffix
-            for i in range(min_len, len(text) - min_len + 1):
-                prefix = text[:i]
-                suffix = text[i:]
-                
-                if self.is_in_dict(prefix, lang_code):
-                    suffix_splits = _recursive_split(suffix)
-                    for s_split in suffix_splits:
-                        valid_splits.append([prefix] + s_split)
-                        
-            memo[text] = valid_splits
-            return valid_splits
-
-        all_splits = _recursive_split(compound_word)
-        # Filter specifically for compound usage (2 or more parts)
-        return [s for s in all_splits if len(s) >= 2]
+        try:
+            yield from self.splitter.iter_splits(compound_word, lang_code, min_len=min_len, rank=rank)
+        except Exception as e:
+            print(f"WordNet error: {e}")
 
 if __name__ == "__main__":
     splitter = SubwordTokenizer()
@@ -180,15 +235,6 @@ if __name__ == "__main__":
     #     print(f"{word}: {splitter.split_compound(word)}")
 
     # Example 2: Thai
-    word_list_th = [
-        "ตู้เย็น", "พัดลม", "เตารีด", "รถเมล์", "ปากกา",
-        "น้ำปลา", "ใจดี", "อ่อนน้อม", "บ้านพัก", "ทางม้าลาย",
-        "แม่ครัว", "ลูกน้อง", "หนังสือพิมพ์", "ไฟฉาย", "ยาสระผม",
-        "รองเท้า", "ผ้าห่ม", "เข็มขัด", "แกงเผ็ด", "กล้วยแขก",
-        "ตู้เย็นขนาดเล็ก", "เครื่องปรับอากาศ", "เตาไมโครเวฟ", "รถโดยสารประจำทาง", "พนักงานทำความสะอาด",
-        "หนังสือแบบเรียน", "เครื่องซักผ้า", "กล้องถ่ายรูป", "น้ำยาล้างจาน", "รองเท้าผ้าใบ",
-        "โทรศัพท์มือถือ", "ทางม้าลายข้ามถนน", "รถไฟความเร็วสูง", "แผ่นพับโฆษณา", "กระดาษชำระ",
-        "หม้อหุงข้าวไฟฟ้า", "กระเป๋าสตางค์", "ไม้บรรทัดเหล็ก", "ยาสีฟันสมุนไพร", "ช้อนส้อมพลาสติก"
-    ]
+    word_list_th = THAI_COMPOUND_EXAMPLES
     for word in word_list_th:
         print(f"{word}: {splitter.split_compound(word)}")
\ No newline at end of file
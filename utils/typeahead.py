@@ -0,0 +1,252 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from utils.lexical_index import short_description, split_words
+
+# Emoji index entries looked at when ranking suggestions, so a one-letter prefix is as
+# cheap as a long one. Popular-query ranges up to this size are ranked by sorting them.
+SCAN_LIMIT = 256
+
+# Popular query counts come from user input, so they are bounded: once more than
+# POPULAR_PRUNE_FACTOR * max_popular distinct queries are counted, only the
+# POPULAR_KEEP_FACTOR * max_popular most common are kept. Longer queries are not counted.
+POPULAR_PRUNE_FACTOR = 4
+POPULAR_KEEP_FACTOR = 2
+MAX_POPULAR_QUERY_LENGTH = 64
+
+# Seconds the popular-query index is reused before newly recorded queries are indexed
+POPULAR_REFRESH_INTERVAL = 10.0
+
+
+def typeahead_key(text: str) -> str:
+    """
+    Case-folded words of partially typed text. A trailing space is kept so that
+    "red " only matches phrases continuing with another word.
+    """
+    key = " ".join(split_words(text.casefold()))
+    if key and text[-1:].isspace():
+        key += " "
+    return key
+
+
+class PrefixIndex:
+    """
+    Read-only prefix index over phrases, stored as one sorted key array.
+
+    Every phrase is keyed by each of its word-start suffixes ("dog face" under
+    "dog face" and "face"), so typing any word of a name finds it. The keys matching a
+    prefix are one contiguous [lo, hi) range, and extending the prefix only narrows
+    that range (two bisections inside it), like `PrefixTrie` in utils.compound_splitter.
+    """
+
+    def __init__(self, phrases: dict, ranked: bool = False):
+        """
+        Args:
+            phrases (dict): Phrase (already normalized with `typeahead_key`) -> payload.
+            ranked (bool): Payloads are counts; also keep the entries in count order for `top`.
+        """
+        entries = sorted(
+            (" ".join(words[i:]), phrase)
+            for phrase in phrases
+            for words in [phrase.split()]
+            for i in range(len(words))
+        )
+        self.keys = [key for key, _ in entries]
+        self.entry_phrases = [phrase for _, phrase in entries]
+        self.phrases = phrases
+        self.ranked = sorted(
+            range(len(entries)), key=lambda i: (-phrases[entries[i][1]], entries[i][1])
+        ) if ranked else None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def range(self, prefix: str, lo: int = 0, hi: int | None = None) -> tuple[int, int]:
+        """Return the [lo, hi) range of keys starting with `prefix`, searching only inside [lo, hi)."""
+        hi = len(self.keys) if hi is None else hi
+        lo = bisect_left(self.keys, prefix, lo, hi)
+        hi = bisect_left(self.keys, prefix + "\U0010ffff", lo, hi)
+        return lo, hi
+
+    def top(self, lo: int, hi: int, n: int) -> list[str]:
+        """
+        The `n` phrases with the highest counts among the keys in [lo, hi) (needs `ranked`).
+        A small range is sorted directly; a large one is found by walking the entries in
+        count order, where matches are dense and come early.
+        """
+        if hi - lo <= SCAN_LIMIT:
+            phrases = {self.entry_phrases[i] for i in range(lo, hi)}
+            return sorted(phrases, key=lambda phrase: (-self.phrases[phrase], phrase))[:n]
+
+        output = []
+        for i in self.ranked:
+            if len(output) >= n:
+                break
+            if lo <= i < hi and self.entry_phrases[i] not in output:
+                output.append(self.entry_phrases[i])
+        return output
+
+
+class Typeahead:
+    """
+    As-you-type suggestions from emoji names, tags and popular queries.
+
+    Lookups never touch the embedding model; the full semantic search is meant to run
+    only once the input has settled (see `TypeaheadSession.settled`).
+    """
+
+    def __init__(self, ids, documents, metadatas, popular: Counter | None = None, max_popular: int = 1000,
+                 refresh_interval: float = POPULAR_REFRESH_INTERVAL):
+        """
+        Args:
+            ids (Sequence[str]): Emoji ids.
+            documents (Sequence[str]): Document text per id; the short description is the emoji name.
+            metadatas (Sequence[dict]): Metadata per id, with "character" and comma-joined "tags".
+            popular (Counter | None): Query counts to start from (e.g. kept across a rebuild).
+            max_popular (int): Most popular queries kept in the popular-query index.
+            refresh_interval (float): Seconds between rebuilds of the popular-query index
+                while new queries are being recorded.
+        """
+        phrases = {}
+        for row, (document, metadata) in enumerate(zip(documents, metadatas)):
+            fields = [short_description(document)]
+            fields.extend((metadata or {}).get("tags", "").split(","))
+            for field in fields:
+                phrase = typeahead_key(field.strip())
+                rows = phrases.setdefault(phrase, []) if phrase else None
+                if rows is not None and (not rows or rows[-1] != row):
+                    rows.append(row)
+
+        self.ids = ids
+        self.metadatas = metadatas
+        self.emoji_index = PrefixIndex(phrases)
+        self.max_popular = max_popular
+        self.refresh_interval = refresh_interval
+        self.popular = Counter(popular or ())
+        self._prune_popular()
+        self._popular_index = None
+        self._popular_built_at = 0.0
+        self._popular_changed = False
+        self._lock = threading.Lock()
+
+    def record_query(self, query: str):
+        """Count a submitted query so it is suggested to later users."""
+        key = typeahead_key(query).strip()
+        if key and len(key) <= MAX_POPULAR_QUERY_LENGTH:
+            with self._lock:
+                self.popular[key] += 1
+                self._popular_changed = True
+                if len(self.popular) > POPULAR_PRUNE_FACTOR * self.max_popular:
+                    self._prune_popular()
+
+    def _prune_popular(self):
+        """Keep only the most common queries once there are too many distinct ones."""
+        if len(self.popular) > POPULAR_PRUNE_FACTOR * self.max_popular:
+            self.popular = Counter(dict(self.popular.most_common(POPULAR_KEEP_FACTOR * self.max_popular)))
+
+    def popular_index(self) -> PrefixIndex:
+        """
+        Prefix index over the most popular queries. Recorded queries are picked up at
+        most every `refresh_interval` seconds, so sessions keep narrowing within the same
+        index between rebuilds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            stale = self._popular_changed and now - self._popular_built_at >= self.refresh_interval
+            if self._popular_index is None or stale:
+                self._popular_index = PrefixIndex(dict(self.popular.most_common(self.max_popular)), ranked=True)
+                self._popular_built_at = now
+                self._popular_changed = False
+            return self._popular_index
+
+    def session(self) -> "TypeaheadSession":
+        """State for one input box, narrowing candidates keystroke by keystroke."""
+        return TypeaheadSession(self)
+
+    def suggest(self, text: str, n_suggestions: int = 8) -> list[dict]:
+        """One-off lookup without a session."""
+        return self.session().update(text, n_suggestions)
+
+    def characters(self, rows) -> list[str]:
+        """Emoji characters of `rows`."""
+        return [self.metadatas[row].get("character", "") for row in rows]
+
+
+class TypeaheadSession:
+    """
+    Keystroke-by-keystroke state of one input box.
+
+    The [lo, hi) key ranges of the previous input are kept; when the new input extends
+    it, the lookup bisects inside those ranges instead of the whole index.
+    """
+
+    def __init__(self, typeahead: Typeahead):
+        self.typeahead = typeahead
+        self.text = ""
+        self.prefix = ""
+        self.updated_at = 0.0
+        self.ranges = {}
+
+    def update(self, text: str, n_suggestions: int = 8) -> list[dict]:
+        """
+        Register the current input and return suggestions for it.
+
+        Returns:
+            list[dict]: Up to `n_suggestions` of {"text", "characters", "source"}, where
+                "source" is "popular" or "emoji".
+        """
+        prefix = typeahead_key(text)
+        indexes = {"popular": self.typeahead.popular_index(), "emoji": self.typeahead.emoji_index}
+        for name, index in indexes.items():
+            lo, hi = 0, None
+            previous = self.ranges.get(name)
+            # Only narrow within the same index (the popular one is rebuilt periodically)
+            if previous and previous[0] is index and self.prefix and prefix.startswith(self.prefix):
+                lo, hi = previous[1], previous[2]
+            self.ranges[name] = (index, *index.range(prefix, lo, hi))
+
+        self.text = text
+        self.prefix = prefix
+        self.updated_at = time.monotonic()
+        return self.suggestions(n_suggestions) if prefix.strip() else []
+
+    def settled(self, debounce_ms: float) -> bool:
+        """True once the input has not changed for `debounce_ms`."""
+        return (time.monotonic() - self.updated_at) * 1000 >= debounce_ms
+
+    def suggestions(self, n_suggestions: int = 8) -> list[dict]:
+        """Rank the current candidate ranges: popular queries by count, then emoji names and tags."""
+        output, seen = [], set()
+
+        # Popular queries ranked by count over the whole matching range
+        index, lo, hi = self.ranges["popular"]
+        for phrase in index.top(lo, hi, n_suggestions):
+            seen.add(phrase)
+            output.append({"text": phrase, "characters": [], "source": "popular"})
+
+        # Phrases that start with the input before ones matching a later word, then shorter first
+        index, lo, hi = self.ranges["emoji"]
+        candidates = sorted(
+            range(lo, min(hi, lo + SCAN_LIMIT)),
+            key=lambda i: (index.keys[i] != index.entry_phrases[i], len(index.entry_phrases[i]), i)
+        )
+        for i in candidates:
+            if len(output) >= n_suggestions:
+                break
+            phrase = index.entry_phrases[i]
+            if phrase in seen:
+                continue
+            seen.add(phrase)
+            output.append({
+                "text": phrase,
+                "characters": self.typeahead.characters(index.phrases[phrase]),
+                "source": "emoji"
+            })
+
+        # Popular queries that are also emoji names get their characters
+        for item in output:
+            if item["source"] == "popular" and item["text"] in self.typeahead.emoji_index.phrases:
+                item["characters"] = self.typeahead.characters(self.typeahead.emoji_index.phrases[item["text"]])
+        return output
@@ -0,0 +1,35 @@
+import threading
+
+
+def warm_up(searcher, tokenizer=None):
+    """Load the model, index, typeahead index and lexicon, and run a throwaway query."""
+    try:
+        searcher.warm_up()
+        searcher.typeahead()
+    except Exception as e:
+        print(f"Error warming up searcher: {e}")
+
+    if tokenizer is not None:
+        try:
+            tokenizer.warm_up()
+        except Exception as e:
+            print(f"Error warming up tokenizer: {e}")
+
+
+def start_warm_up(searcher, tokenizer=None) -> threading.Thread:
+    """Run `warm_up` in a daemon thread so the UI / server can start answering right away."""
+    thread = threading.Thread(target=warm_up, args=(searcher, tokenizer), name="emoji-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def readiness(searcher, tokenizer=None) -> dict:
+    """Readiness flags for the UI and health checks."""
+    searcher_ready = searcher.ready.is_set()
+    tokenizer_ready = tokenizer is None or tokenizer.ready.is_set()
+    return {
+        "ready": searcher_ready and tokenizer_ready,
+        "searcher": searcher_ready,
+        "tokenizer": tokenizer_ready,
+        "error": str(searcher.load_error) if searcher.load_error else None,
+    }
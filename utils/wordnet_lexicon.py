@@ -0,0 +1,162 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from utils.compound_splitter import PrefixTrie
+
+FORMAT_VERSION = 1
+DEFAULT_LEXICON_PATH = "wordnet_lexicon.json.gz"
+# Corpora lemma sets are built from (as downloaded by utils.provision)
+CORPUS_SOURCE = "wordnet-3.0+omw-1.4"
+
+
+class WordNetLexicon:
+    """
+    Per-language sets of WordNet (OMW 1.4) lemma names, so dictionary checks are a
+    set membership test instead of a `wn.synsets()` call that builds Synset objects.
+
+    Sets are built lazily from the corpora on first use of a language, or loaded from
+    a gzipped JSON cache so startup does not need to rescan the corpora. The cache
+    itself is only read on first use, so constructing a lexicon is free.
+    """
+
+    def __init__(self, langs, cache_path=None):
+        """
+        Args:
+            langs (list[str]): ISO 639-3 codes to serve (WordNet / OMW language codes).
+            cache_path (str | None): Gzipped JSON file to load lemma sets from, if it exists.
+        """
+        self.langs = list(langs)
+        self.cache_path = cache_path
+        self._lemmas = {}
+        self._tries = {}
+        self._version = None
+        self._lock = threading.Lock()
+        self._cache_checked = False
+
+    def _load_cache(self):
+        """Load the cache file once, if there is one. Call with `_lock` held."""
+        if self._cache_checked:
+            return
+        self._cache_checked = True
+        if self.cache_path and os.path.exists(self.cache_path):
+            try:
+                self.load(self.cache_path)
+            except Exception as e:
+                print(f"Error loading lexicon cache '{self.cache_path}': {e}")
+
+    @staticmethod
+    def _build(lang: str) -> frozenset:
+        """Scan WordNet for every lemma name of `lang`, lowercased like `wn.synsets` does."""
+        from nltk.corpus import wordnet as wn
+
+        try:
+            return frozenset(name.lower() for name in wn.all_lemma_names(lang=lang))
+        except LookupError as e:
+            raise LookupError(f"WordNet corpora are missing, run `python -m utils.provision` first.\n{e}") from e
+
+    def lemmas(self, lang: str) -> frozenset:
+        """Return the lemma set of `lang`, building it on first use."""
+        lemmas = self._lemmas.get(lang)
+        if lemmas is None:
+            with self._lock:
+                self._load_cache()
+                lemmas = self._lemmas.get(lang)
+                if lemmas is None:
+                    lemmas = self._build(lang)
+                    self._lemmas[lang] = lemmas
+        return lemmas
+
+    def trie(self, lang: str) -> PrefixTrie:
+        """Return the prefix trie over the lemma set of `lang`, building it on first use."""
+        trie = self._tries.get(lang)
+        if trie is None:
+            trie = PrefixTrie(self.lemmas(lang))
+            self._tries[lang] = trie
+        return trie
+
+    def build_all(self):
+        """Build the lemma sets of every configured language."""
+        for lang in self.langs:
+            self.lemmas(lang)
+
+    def contains(self, word: str, lang: str = 'eng') -> bool:
+        """
+        Return True if `word` has at least one WordNet synset in `lang`.
+
+        Equivalent to `len(wn.synsets(word, lang=lang)) > 0`. English words that are not
+        lemmas themselves are checked with `wn.morphy`, which resolves inflections
+        (e.g. "flowers") without building Synset objects.
+        """
+        key = word.lower()
+        if key in self.lemmas(lang):
+            return True
+
+        if lang == 'eng':
+            from nltk.corpus import wordnet as wn
+
+            return wn.morphy(key) is not None
+        return False
+
+    @property
+    def version(self) -> str:
+        """
+        Identifier of where the lemma sets come from, for invalidating data derived from
+        them: the corpus source, the configured languages and the content hash of the cache
+        file. It does not depend on which languages happen to be loaded yet, so every
+        process with the same corpora, languages and cache file reports the same version.
+        """
+        if self._version is None:
+            digest = hashlib.sha1(CORPUS_SOURCE.encode("utf-8"))
+            digest.update(",".join(sorted(self.langs)).encode("utf-8"))
+            if self.cache_path and os.path.exists(self.cache_path):
+                with open(self.cache_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b""):
+                        digest.update(chunk)
+            self._version = digest.hexdigest()[:16]
+        return self._version
+
+    def save(self, path: str):
+        """Write the lemma sets built so far to a gzipped JSON file."""
+        data = {
+            "format_version": FORMAT_VERSION,
+            "langs": {lang: sorted(lemmas) for lang, lemmas in self._lemmas.items()},
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def load(self, path: str):
+        """Load lemma sets from a file written by `save`."""
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+
+        if data.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported lexicon format version: {data.get('format_version')}")
+
+        for lang, lemmas in data["langs"].items():
+            self._lemmas[lang] = frozenset(lemmas)
+            self._tries.pop(lang, None)
+
+
+if __name__ == "__main__":
+    # Precompute the lexicon of every supported language:
+    #   python -m utils.wordnet_lexicon [output_path]
+    import sys
+
+    from utils.subword_tokenizer import SubwordTokenizer
+
+    output_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_LEXICON_PATH
+    lexicon = WordNetLexicon(SubwordTokenizer().supported_langs)
+    lexicon.build_all()
+    lexicon.save(output_path)
+    print(f"Saved {sum(len(l) for l in lexicon._lemmas.values())} lemmas "
+          f"for {len(lexicon._lemmas)} languages to {output_path}")